@@ -8,13 +8,14 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/05/14 19:30:55 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/18 23:34:05 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 import missingno as msno
 import matplotlib.pyplot as plt
 import pandas as pd
+import numpy as np
 
 def inspect_data(df=None, display_form='matrix', freq=None, figsize=(6,4)):
   """
@@ -38,9 +39,7 @@ def remove_empty_columns(data):
   """
     Removes columns of the dataframe which countains only unknown values
   """
-  for column in data.columns:
-    if all(data[column].isna()):
-      data.drop(column, axis=1, inplace=True)
+  data.drop(columns=data.columns[data.isna().all().to_numpy()], inplace=True)
   return data
 
 
@@ -49,12 +48,60 @@ def shift_data(data, nb_shifts=1):
     Duplicates columns of the dataframe with a shift.
     Possibility to apply multiple shifts.
     ie: if nb_shifts = 2; columns will be duplicated with a shift of 1 and a shift of 2
+    All the shifts are views of a single padded array, the result is built at once
   """
-  data_to_shift = data.copy()
-  for i in range(nb_shifts):
-    data_shifted = data_to_shift.copy()
-    data_shifted = data_shifted.shift(periods=i+1)
-    data_shifted = data_shifted.add_suffix(f"_h-{i+1}")
-    data = pd.concat([data, data_shifted], axis=1)
-  return data
-  
\ No newline at end of file
+  values = data.to_numpy(dtype=float)
+  padded = np.concatenate([np.full((nb_shifts, values.shape[1]), np.nan), values])
+  shifted = [padded[nb_shifts - i:nb_shifts - i + len(data)] for i in range(nb_shifts + 1)]
+  columns = list(data.columns) + [f"{column}_h-{i+1}" for i in range(nb_shifts) for column in data.columns]
+  return pd.DataFrame(np.hstack(shifted), index=data.index, columns=columns)
+
+
+def lttb(x, y, n_out):
+  """
+    Largest-Triangle-Three-Buckets downsampling of the points (x, y), which keeps the visual shape of the series
+    The points between the first and the last are split into n_out - 2 buckets, in each bucket the point forming the largest triangle
+    with the previously kept point and the mean of the next bucket is kept
+    Returns the sorted positions of the n_out kept points (all the positions if n_out >= len(x))
+  """
+  n = len(x)
+  if n_out >= n or n_out < 3:
+    return np.arange(n)
+  edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(int), n)
+  selected = np.empty(n_out, dtype=int)
+  selected[0], selected[-1] = 0, n - 1
+  a = 0
+  for i in range(n_out - 2):
+    start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+    mean_x, mean_y = x[end:next_end].mean(), y[end:next_end].mean()
+    areas = np.abs((x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a]))
+    a = start + int(np.argmax(areas))
+    selected[i + 1] = a
+  return selected
+
+def downsample_series(series, n_points=2000):
+  """
+    Downsamples a series to about n_points with LTTB (see lttb) to plot it quickly
+    The missing values are not plotted: the first and last known values around each gap are always kept and a single np.nan is put
+    in each gap, so that the series is drawn as one line broken at the gaps
+  """
+  if isinstance(series.index, pd.DatetimeIndex):
+    x = series.index.asi8.astype(float)
+  else:
+    x = np.arange(len(series), dtype=float)
+  y = series.to_numpy(dtype=float, na_value=np.nan)
+
+  known = np.flatnonzero(~np.isnan(y))
+  if len(known) == 0:
+    return series.iloc[:0]
+  # known values which start a segment of consecutive known values
+  starts = np.diff(known, prepend=-2) > 1
+  ends = np.append(starts[1:], True)
+  kept = np.union1d(lttb(x[known], y[known], n_points), np.flatnonzero(starts | ends))
+
+  segments = np.cumsum(starts)[kept]
+  positions = known[kept]
+  # a missing record is inserted after the last kept value of each segment but the last one
+  breaks = positions[np.flatnonzero(np.diff(segments))] + 1
+  positions = np.sort(np.concatenate([positions, breaks]))
+  return series.iloc[positions].where(~np.isin(positions, breaks))
@@ -8,15 +8,22 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/05/14 19:50:26 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/18 23:34:05 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 import pandas as pd
+import io
+import os
 import re
-import seaborn as sns
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 
+from libs.utils_data import downsample_series
+
+FLOAT_COLUMNS = ['Temp (°C)', 'Point de rosée (°C)', 'Pression à la station (kPa)', 'Visibilité (km)']
+
 def replace_from_dic(string, dic):
   """
     Replaces in a string the keys of a dictionnary by their value
@@ -41,30 +48,63 @@ def reference_to_string(reference):
   """
   return f"{reference['{DAY}']}-{reference['{MONTH}']}-{reference['{YEAR}']}"
 
-def load_day_meteorological_data(meteorological_data, day_url):
+def read_url(url):
+  """
+    Reads the raw content of an url (http, https, file...) or of a local file path
+  """
+  if re.match('^[a-zA-Z][a-zA-Z0-9+.-]*://', url):
+    with urllib.request.urlopen(url) as response:
+      return response.read()
+  with open(url, 'rb') as file:
+    return file.read()
+
+def day_cache_path(cache_dir, station_id, day):
   """
-    Loads meteorological data for one day and add it to the meteorological_data dataframe given. Sets datetime as index. 
+    Generates the path of the cached csv file for a station and a day
   """
-  data = pd.read_csv(day_url)
+  return os.path.join(cache_dir, str(station_id), f"{day.year}-{day.month:02d}-{day.day:02d}.csv")
+
+def load_day_meteorological_data(day_url, cache_path=None):
+  """
+    Loads meteorological data for one day. Sets datetime as index and converts the float columns while reading.
+    If cache_path is given, the raw csv is read from it when it exists, otherwise it is downloaded and saved there.
+  """
+  if cache_path is not None and os.path.exists(cache_path):
+    content = read_url(cache_path)
+  else:
+    content = read_url(day_url)
+    if cache_path is not None:
+      os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+      # write then rename so that an interrupted download never leaves a partial file in the cache
+      with open(cache_path + '.tmp', 'wb') as file:
+        file.write(content)
+      os.replace(cache_path + '.tmp', cache_path)
+
+  data = pd.read_csv(io.BytesIO(content), dtype={float_column: str for float_column in FLOAT_COLUMNS})
   data['Date/Heure (UTC)'] = pd.to_datetime(data['Date/Heure (UTC)'], format='%Y-%m-%d %H:%M')
   data = data.set_index('Date/Heure (UTC)')
-  meteorological_data = pd.concat([meteorological_data, data], axis=0)
-  return meteorological_data
+  return convert_columns_to_float_type(data)
 
-def load_meteorological_data(indexes, csv_meteo_for_one_day, stations_id):
+def load_meteorological_data(indexes, csv_meteo_for_one_day, stations_id, cache_dir=None, max_workers=8):
   """
-     Loads meteorological data for all indexes. Creates an unique dateframe containing meteorological data for all days (indexes). 
+     Loads meteorological data for all indexes. Creates an unique dateframe containing meteorological data for all days (indexes).
+     Days are downloaded concurrently by max_workers threads and, if cache_dir is given, kept on disk by station and day.
+     csv_meteo_for_one_day may be an url or a local path template using {STATIONID}, {YEAR}, {MONTH} and {DAY}.
   """
-  meteorological_data = pd.DataFrame()
-  already_loaded = []
+  days = pd.DatetimeIndex(indexes).normalize().unique().sort_values()
+  station_id = stations_id[0]
+
+  def load_day(day):
+    reference = index_to_reference(day)
+    reference['{STATIONID}'] = station_id
+    cache_path = day_cache_path(cache_dir, station_id, day) if cache_dir is not None else None
+    return load_day_meteorological_data(replace_from_dic(csv_meteo_for_one_day, reference), cache_path)
 
-  for index in pd.DatetimeIndex(indexes):
-    reference = index_to_reference(index)
-    if reference_to_string(reference) not in already_loaded:
-      print('adding new day : ' + reference_to_string(reference))
-      already_loaded.append(reference_to_string(reference))
-      reference['{STATIONID}'] = stations_id[0]
-      meteorological_data = load_day_meteorological_data(meteorological_data, replace_from_dic(csv_meteo_for_one_day, reference))
+  print(f'loading {len(days)} days')
+  with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    days_data = list(executor.map(load_day, days))
+
+  meteorological_data = pd.concat(days_data, axis=0) if days_data else pd.DataFrame()
   meteorological_data = meteorological_data.loc[~meteorological_data.index.duplicated(keep='first')]
   return meteorological_data
 
@@ -78,22 +118,27 @@ def remove_unused_columns(data):
     
   return data
 
-def convert_columns_to_float_type(data):
+def convert_columns_to_float_type(data, float_columns=None):
   """
     Changes , to . in order to change the data type and have columns as float
+    Missing columns are skipped and columns which are already numerical are only cast to float
   """
-  float_columns = ['Temp (°C)', 'Point de rosée (°C)', 'Pression à la station (kPa)', 'Visibilité (km)']
+  if float_columns is None:
+    float_columns = FLOAT_COLUMNS
   for float_column in float_columns:
-    data[float_column] = data[float_column].str.replace(",", ".")
+    if float_column not in data.columns:
+      continue
+    if not pd.api.types.is_numeric_dtype(data[float_column]):
+      data[float_column] = data[float_column].str.replace(",", ".", regex=False)
     data[float_column] = data[float_column].astype(float)
- 
-  return data
 
+  return data
 
 
-def plot_meteorological_data(dataframe):
+def plot_meteorological_data(dataframe, n_points=2000):
   """
     Plots the meteorological data
+    Each column is drawn as one line, downsampled to about n_points with LTTB and broken at the missing values
   """
   
   columns = ['Temp (°C)', 'Point de rosée (°C)', 'Hum. rel (%)',
@@ -104,18 +149,7 @@ def plot_meteorological_data(dataframe):
   for i, column in enumerate(columns):
     ax = axs[i // 3][i % 3]
     ax.title.set_text(column)
-    pal = ['#20F']*sum(dataframe[column].isna())
-    if len(pal) == 0:
-        pal=['#20F']
-    g = sns.lineplot(ax=ax, 
-                  data=dataframe, 
-                  x=dataframe.index, 
-                  y=column,
-                  hue=dataframe[column].isna().cumsum(),
-                  palette=pal,
-                  legend=False,
-                  markers=True,
-                  alpha=.9
-              )
+    series = downsample_series(dataframe[column], n_points)
+    ax.plot(series.index, series.to_numpy(), color='#20F', alpha=.9)
 
     ax.set(ylabel=None)
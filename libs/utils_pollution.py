@@ -8,58 +8,120 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/05/14 19:50:11 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/18 23:40:28 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 import pandas as pd
-import numpy as np
 import re
-import seaborn as sns
 import matplotlib.pyplot as plt
 import matplotlib.lines as mlines
 
-def concatenate_new_station(data, station_data, station_id):
+from libs.utils_data import downsample_series
+
+def parse_date_heure(date_heure, date_format='%d-%m-%Y'):
   """
-    Concatenates a new station data to the current data
-    Sets date_heure as index and rename columns by adding the station id into it
+    Parses the 'date_heure' strings ("dd-mm-YYYY HH:MM") of the pollution data into a DatetimeIndex
+    Each distinct string is parsed only once since all the stations share the same timestamps
   """
-  station_data = station_data.drop(columns=['numero_station'])
-  station_data[['date','heure']] = station_data['date_heure'].str.split(expand=True)
-  station_data['date_heure'] = (pd.to_datetime(station_data.pop('date'), format='%d-%m-%Y') + pd.to_timedelta(station_data.pop('heure') + ':00'))
-  station_data = station_data.set_index('date_heure')
+  codes, uniques = pd.factorize(date_heure)
+  parts = pd.Series(uniques).str.split(expand=True)
+  parsed = pd.to_datetime(parts[0], format=date_format) + pd.to_timedelta(parts[1] + ':00')
+  return pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT).rename('date_heure')
 
-  # add station_id to pollutant column name
-  station_data.columns = [feature + "_station_" + str(station_id) for feature in station_data.columns]
-  data = pd.concat([data, station_data], axis=1, join='outer')
-  return data
+UNKNOWN_VALUES = ['<Samp', 'InVld', 'NoData', 'Down', 'Calib', 'Zero', 'Span', 'Purge', 'Alarm', 'FailPwr', 'N/M']
 
-def transform_all_pollutants_data(data):
+def convert_pollutants_values(data, pollutants, dtype='float32'):
   """
-    Transforms the pollutant data to have one column for each sensor of each station
+    Converts the raw pollutant columns of the (long) pollution data to dtype, with one pass by column
+    Unknown values (UNKNOWN_VALUES) become np.nan and are counted for each sensor
+    Returns the converted values and a dataframe with one line by sensor and one column by unknown value
+  """
+  values = {}
+  unknown_values = []
+  for pollutant in pollutants:
+    column = data[pollutant]
+    values[pollutant] = pd.to_numeric(column, errors='coerce').astype(dtype)
+    unknown = column[values[pollutant].isna().to_numpy() & column.notna().to_numpy()]
+    unexpected = set(unknown.unique()).difference(UNKNOWN_VALUES)
+    if unexpected:
+      raise ValueError(f"Unexpected values {sorted(unexpected)} in the column {pollutant}")
+    unknown_values.append(pd.DataFrame({
+      'sensor': pollutant + "_station_" + data.loc[unknown.index, 'numero_station'].astype(str),
+      'value': unknown,
+    }))
+
+  unknown_values = pd.concat(unknown_values, ignore_index=True)
+  unknown_counts = pd.crosstab(unknown_values['sensor'], unknown_values['value']).reindex(columns=UNKNOWN_VALUES, fill_value=0)
+  unknown_counts.index.name = None
+  unknown_counts.columns.name = None
+  return pd.DataFrame(values, index=data.index), unknown_counts
+
+def pivot_pollutants_data(values, stations, pollutants):
+  """
+    Pivots the long pollutant values (indexed by date_heure and numero_station) to have one column for each sensor of each station
   """
-  fr = pd.DataFrame()
-  for station_id in data['numero_station'].unique():
-    fr = concatenate_new_station(fr, data[data['numero_station'] == station_id], station_id)
+  fr = values.unstack(level=1)
+  # stations in order of appearance, pollutants in file order
+  fr = fr.reindex(columns=pd.MultiIndex.from_tuples([(pollutant, station_id) for station_id in stations for pollutant in pollutants]))
+  fr.columns = [pollutant + "_station_" + str(station_id) for pollutant, station_id in fr.columns]
   return fr
 
+def long_pollutants_data(data, dtype='float32'):
+  """
+    Converts the raw pollution data to dtype values indexed by date_heure and numero_station
+    Returns the values and the count of unknown values for each sensor
+  """
+  pollutants = [c for c in data.columns if c not in ['numero_station', 'date_heure']]
+  values, unknown_counts = convert_pollutants_values(data, pollutants, dtype=dtype)
+  values.index = pd.MultiIndex.from_arrays([parse_date_heure(data['date_heure']), data['numero_station'].to_numpy()])
+  return values, unknown_counts
+
+def transform_all_pollutants_data(data, dtype='float32'):
+  """
+    Transforms the pollutant data to have one column for each sensor of each station
+    Timestamps are parsed once and the long table is pivoted in a single operation, unknown values become np.nan
+  """
+  values, _ = long_pollutants_data(data, dtype=dtype)
+  return pivot_pollutants_data(values, data['numero_station'].unique(), list(values.columns))
+
+def load_pollution_data(csv_path, dtype='float32', chunksize=None, **read_csv_kwargs):
+  """
+    Loads the RSQA pollution csv file and transforms it with one column for each sensor of each station
+    If chunksize is given, the file is read by chunks and only one chunk of raw values is kept in memory
+    Returns the transformed data and the count of unknown values for each sensor (useful to follow sensors health)
+  """
+  chunks = pd.read_csv(csv_path, dtype={'date_heure': str}, chunksize=chunksize, **read_csv_kwargs)
+  if chunksize is None:
+    chunks = [chunks]
+
+  values = []
+  unknown_counts = None
+  stations = {}
+  for chunk in chunks:
+    stations.update(dict.fromkeys(chunk['numero_station'].unique()))
+    chunk_values, chunk_unknown_counts = long_pollutants_data(chunk, dtype=dtype)
+    values.append(chunk_values)
+    unknown_counts = chunk_unknown_counts if unknown_counts is None else unknown_counts.add(chunk_unknown_counts, fill_value=0).astype(int)
+
+  values = pd.concat(values)
+  data = pivot_pollutants_data(values, list(stations), list(values.columns))
+  return data, unknown_counts.reindex(index=data.columns, fill_value=0)
+
 def convert_unknown_values_to_na(data):
   """
     Converts string values as np.nan to considere them as unknown
     Sets columns as float type
   """
-  considered_as_unknown = ['<Samp', 'InVld', 'NoData', 'Down', 'Calib', 'Zero', 'Span', 'Purge', 'Alarm', 'FailPwr', 'N/M']
   for column in data.columns:
-    for to_replace in considered_as_unknown:
-      data[column] = np.where((data[column] == to_replace), np.nan ,data[column])
-    data[column] = data[column].astype(float)
+    data[column] = data[column].mask(data[column].isin(UNKNOWN_VALUES)).astype(float)
 
   return data
 
-
-def plot_pollution_data(dataframe):
+def plot_pollution_data(dataframe, n_points=2000):
   """
     Plots the pollution data
+    Each sensor is drawn as one line, downsampled to about n_points with LTTB and broken at the missing values
   """
   stations_color = {
       3: '#FF4949',
@@ -85,19 +147,8 @@ def plot_pollution_data(dataframe):
       for y_column in y_columns:
           x = re.search('station_([0-9]+)', y_column)
           station = x.group(1)
-          pal = [stations_color[int(station)]]*sum(dataframe[y_column].isna())
-          if (len(pal) == 0):
-            pal = [stations_color[int(station)]]
-          g = sns.lineplot(ax=ax, 
-                  data=dataframe, 
-                  x=dataframe.index, 
-                  y=y_column,
-                  hue=dataframe[y_column].isna().cumsum(),
-                  palette=pal,
-                  legend=False,
-                  markers=True,
-                  alpha=.9
-              )
+          series = downsample_series(dataframe[y_column], n_points)
+          ax.plot(series.index, series.to_numpy(), color=stations_color[int(station)], alpha=.9)
 
       plt.legend(handles=[mlines.Line2D([], [], color=f"{stations_color[id]}", label=f"Station {id}") for id in stations_color])
       ax.set(ylabel=None)
@@ -0,0 +1,257 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      Backtest.py                                        ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/19 00:07:15 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.MissingnessIndex import MissingnessIndex
+from src.scripts.utils import stationary_dataframe
+
+from concurrent.futures import ProcessPoolExecutor
+from statsmodels.tsa.api import VAR
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _backtest_columns(values, columns, origins, horizon, n_diff, lag, criterion):
+    """
+    Private function, run the rolling-origin VAR forecasts of one set of columns. The stationarity (number of differencing) and the lag order, if not given, are decided once on the longest segment of known records of the first training window and reused by all the folds
+    The records are never spliced around the missing values: the differences and the lags only use the records t known from t - lag - n_diff to t (see `MissingnessIndex.get_run_lengths()`), the VAR is fitted by least squares on these records, and a fold is skipped (np.nan) if one of its last lag + n_diff records before the origin is missing
+
+    Returns:
+        dict with the `n_diff`, the `lag`, the `rmse` array of shape (len(origins), len(columns)) and the `runtime`
+    """
+    start = time.perf_counter()
+    n_columns = len(columns)
+    missingness = MissingnessIndex(values)
+    run_lengths = missingness.get_run_lengths(missingness.get_columns())
+
+    if n_diff is None or lag is None:
+        # longest segment of known records of the first training window
+        window = run_lengths[: origins[0]]
+        end = int(np.argmax(window)) + 1 if len(window) else 0
+        segment = values[end - (window[end - 1] if end else 0) : end]
+        df, n_diff = stationary_dataframe(pd.DataFrame(segment, columns=columns))
+    if lag is None:
+        lag = VAR(df.to_numpy()).select_order().selected_orders[criterion]
+    lag = max(lag, 1)
+
+    differences = values
+    if n_diff:
+        differences = np.concatenate(
+            [np.full((n_diff, n_columns), np.nan), np.diff(values, n=n_diff, axis=0)]
+        )
+    usable = np.flatnonzero(run_lengths > lag + n_diff)
+
+    rmse = np.full((len(origins), n_columns), np.nan)
+    for i, origin in enumerate(origins):
+        rows = usable[: np.searchsorted(usable, origin)]
+        if len(rows) <= lag * n_columns + 1 or run_lengths[origin - 1] < lag + n_diff:
+            continue
+        # VAR(lag) with constant fitted by least squares, the regressors of t are [1, y[t - 1], ..., y[t - lag]]
+        z = np.hstack(
+            [np.ones((len(rows), 1))]
+            + [differences[rows - k] for k in range(1, lag + 1)]
+        )
+        coefficients = np.linalg.lstsq(z, differences[rows], rcond=None)[0]
+        history = list(differences[origin - lag : origin])
+        forecast = np.empty((horizon, n_columns))
+        for step in range(horizon):
+            regressors = np.concatenate([[1.0]] + history[: -lag - 1 : -1])
+            forecast[step] = regressors @ coefficients
+            history.append(forecast[step])
+        # integrate the forecasted differences back to the levels, from the last records before the origin
+        for d in range(n_diff, 0, -1):
+            last = np.diff(values[origin - d : origin], n=d - 1, axis=0)[-1]
+            forecast = last + np.cumsum(forecast, axis=0)
+        actual = values[origin : origin + horizon]
+        with np.errstate(invalid="ignore"):
+            rmse[i] = np.sqrt(np.nanmean((forecast - actual) ** 2, axis=0))
+
+    return {
+        "n_diff": n_diff,
+        "lag": lag,
+        "rmse": rmse,
+        "runtime": time.perf_counter() - start,
+    }
+
+
+class Backtest:
+    """
+    Backtest evaluates the features selected by several methods with rolling-origin VAR forecasts: for each fold, a VAR model is trained on all the records before the origin and forecasts the next horizon records of the target. The models are fitted without splicing the records around the missing values, and a fold whose last records before the origin are missing is skipped.
+    Each distinct set of columns (selected features and target) is evaluated once, even if it is selected by several methods, and its stationarity and lag order are decided on the first fold only. The sets of columns are evaluated in parallel processes.
+
+    Args:
+        dataframe (DataFrame) : dataframe which contains the data, 1 column by feature and 1 line by entry
+        n_folds (int) : number of forecast origins, the last one is horizon records before the end. n_folds * horizon must be lower than the number of records
+        horizon (int) : number of forecasted records by fold
+        lag (int | None) : lag order of the VAR models, if None, selected on the first fold with the criterion
+        criterion (str) : criterion used to select the lag order (`aic`, `bic`, `hqic` or `fpe`)
+        n_workers (int | None) : number of worker processes, if None, one by CPU. With 1, the sets of columns are evaluated in the current process
+
+    Attributes:
+        _dataframe (DataFrame) : dataframe which contains the data
+        _n_folds (int) : number of forecast origins
+        _horizon (int) : number of forecasted records by fold
+        _lag (int | None) : lag order of the VAR models
+        _criterion (str) : criterion used to select the lag order
+        _n_workers (int | None) : number of worker processes
+        _decisions (dict) : cache of the stationarity and lag order decisions by set of columns, reused by the next runs
+        _fold_rmse (DataFrame | None) : RMSE of each fold, for each method and target, of the last run
+
+    Example:
+    ```python
+    from src.Backtest import Backtest
+
+    fs.select(data, target_columns=['pm2_5_station_3'], method_names=['PearsonCorrelation', 'GrangerCausality'], number_of_target_to_keep=5)
+    backtest = Backtest(data, n_folds=10, horizon=24)
+    backtest.run(fs.get_selected_features())  # RMSE and runtime by method and target
+    ```
+    """
+
+    _dataframe = None
+    _n_folds = None
+    _horizon = None
+    _lag = None
+    _criterion = None
+    _n_workers = None
+    _decisions = None
+    _fold_rmse = None
+
+    def __init__(
+        self,
+        dataframe,
+        n_folds=5,
+        horizon=24,
+        lag=None,
+        criterion="aic",
+        n_workers=None,
+    ):
+        if n_folds < 1 or horizon < 1:
+            raise ValueError("n_folds and horizon must be at least 1")
+        if n_folds * horizon >= len(dataframe):
+            raise ValueError(
+                f"n_folds * horizon ({n_folds * horizon}) must be lower than the number of records ({len(dataframe)}), the records before the first origin are the first training window"
+            )
+        self._dataframe = dataframe
+        self._n_folds = n_folds
+        self._horizon = horizon
+        self._lag = lag
+        self._criterion = criterion
+        self._n_workers = n_workers
+        self._decisions = dict()
+
+    def get_origins(self):
+        """
+        Get the positions of the forecast origins (first forecasted record of each fold)
+        """
+        n_records = len(self._dataframe)
+        return [
+            n_records - self._horizon * (self._n_folds - i)
+            for i in range(self._n_folds)
+        ]
+
+    def run(self, selected_features):
+        """
+        Run the backtest of the selected features
+
+        Args:
+            selected_features (dict) : selected features by method and target, as returned by `FeatureSelection.get_selected_features()`
+
+        Returns:
+            DataFrame indexed by (method, target) with the mean `rmse` over the folds, the `runtime` (in seconds) of the evaluation of the set of columns, the number of `features`, and the `n_diff` and `lag` used
+        """
+        # distinct sets of columns, the target always being the first column
+        column_sets = {
+            (method, target): tuple(dict.fromkeys([target] + list(features)))
+            for method, features_by_target in selected_features.items()
+            for target, features in features_by_target.items()
+        }
+        results = dict(self._evaluate(list(dict.fromkeys(column_sets.values()))))
+
+        rows, fold_rmse = [], dict()
+        for (method, target), columns in column_sets.items():
+            result = results[columns]
+            rmse = result["rmse"][:, 0]
+            fold_rmse[(method, target)] = rmse
+            rows.append(
+                {
+                    "method": method,
+                    "target": target,
+                    "rmse": np.nanmean(rmse) if not np.isnan(rmse).all() else np.nan,
+                    "runtime": result["runtime"],
+                    "features": len(columns) - 1,
+                    "n_diff": result["n_diff"],
+                    "lag": result["lag"],
+                }
+            )
+
+        self._fold_rmse = pd.DataFrame(
+            fold_rmse, index=self._dataframe.index[self.get_origins()]
+        ).T
+        return pd.DataFrame(rows).set_index(["method", "target"])
+
+    def _evaluate(self, column_sets):
+        """
+        Private method. Evaluate every set of columns, in parallel processes, yields the (columns, result) pairs
+        """
+        origins = self.get_origins()
+
+        def arguments(columns):
+            decision = self._decisions.get(
+                frozenset(columns), {"n_diff": None, "lag": self._lag}
+            )
+            values = self._dataframe[list(columns)].to_numpy(
+                dtype=float, na_value=np.nan
+            )
+            return (
+                values,
+                list(columns),
+                origins,
+                self._horizon,
+                decision["n_diff"],
+                decision["lag"],
+                self._criterion,
+            )
+
+        def cache(columns, result):
+            self._decisions[frozenset(columns)] = {
+                "n_diff": result["n_diff"],
+                "lag": result["lag"],
+            }
+
+        if self._n_workers == 1:
+            results = (
+                _backtest_columns(*arguments(columns)) for columns in column_sets
+            )
+            for columns, result in zip(column_sets, results):
+                cache(columns, result)
+                yield columns, result
+            return
+
+        with ProcessPoolExecutor(max_workers=self._n_workers) as executor:
+            futures = [
+                executor.submit(_backtest_columns, *arguments(columns))
+                for columns in column_sets
+            ]
+            for columns, future in zip(column_sets, futures):
+                result = future.result()
+                cache(columns, result)
+                yield columns, result
+
+    def get_fold_rmse(self):
+        """
+        Accessor to the _fold_rmse variable, RMSE of each fold (columns, by forecast origin) for each method and target (lines) of the last run
+        """
+        return self._fold_rmse
@@ -8,20 +8,111 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/06/16 19:02:58 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/19 00:07:38 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 import geopandas
+import numpy as np
+import pandas as pd
+import matplotlib
 from matplotlib import pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
-import re
 import folium
-import wrapt
+import branca
+import json
 import contextily as ctx
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 
 from src.FeatureSelectionMethods.PearsonCorrelation import PearsonCorrelation
 from src.FeatureSelectionMethods.GrangerCausality import GrangerCausality
+from src.FeatureSelectionMethods.CrossCorrelation import CrossCorrelation
+from src.FeatureSelectionMethods.MutualInformation import MutualInformation
+from src.FeatureSelectionMethods.MRMR import MRMR
+from src.FeatureSelectionMethods.PCALoadings import PCALoadings
+from src.SensorStore import SensorStore
+from src.PartitionedSensorStore import PartitionedSensorStore
+from src.LaggedFeatures import LaggedFeatures
+from src.scripts.utils import prune_columns
+
+# colors of the station importances on the interactive maps
+IMPORTANCE_COLORMAP = branca.colormap.LinearColormap(
+    [matplotlib.colormaps["plasma"](value) for value in np.linspace(0, 1, 11)],
+    vmin=0,
+    vmax=1,
+    caption="max_importance_value",
+)
+
+# length of the equator in Spherical Mercator meters, used to find the zoom level of a map
+EARTH_CIRCUMFERENCE = 40075016.686
+
+
+def _station_style(feature):
+    """
+    Style of a station on the interactive maps, from the properties computed in `FeatureSelection._get_geojson_layer()`
+    """
+    return {
+        "fillColor": feature["properties"]["color"],
+        "color": feature["properties"]["color"],
+        "radius": feature["properties"]["radius"],
+        "fillOpacity": 0.8,
+    }
+
+
+def _round_coordinates(geometry, precision):
+    """
+    Round the coordinates of a GeoJSON geometry mapping
+    """
+
+    def round_nested(coordinates):
+        if isinstance(coordinates[0], (int, float)):
+            return [round(coordinate, precision) for coordinate in coordinates]
+        return [round_nested(part) for part in coordinates]
+
+    if geometry["type"] == "GeometryCollection":
+        return {
+            "type": "GeometryCollection",
+            "geometries": [
+                _round_coordinates(part, precision) for part in geometry["geometries"]
+            ],
+        }
+    return {
+        "type": geometry["type"],
+        "coordinates": round_nested(geometry["coordinates"]),
+    }
+
+
+# feature selection shared by the panels rendered by a report worker process, set by _init_report_worker
+_report_worker = None
+
+
+def _init_report_worker(payload):
+    """
+    Private function, give the stations, the importances and the basemap of the report (see `FeatureSelection._get_report_payload()`) to a report worker process, once
+    """
+    global _report_worker
+    _report_worker = FeatureSelection._from_report_payload(payload)
+
+
+def _render_report_panel(target, method, path, dpi):
+    """
+    Private function, render the panel of a target and a method into an image file with the Agg backend, without pyplot
+    """
+    fig = Figure(figsize=(30, 10))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(1, 2, gridspec_kw={"width_ratios": [3, 1]})
+    fig.suptitle(
+        f"Feature importance visualization for the method {method} and the target {target}",
+        fontsize=36,
+    )
+    _report_worker._plot(target, method, ax1, ax2)
+    fig.savefig(path, dpi=dpi)
+    return path
 
 
 class FeatureSelection:
@@ -37,8 +128,17 @@ class FeatureSelection:
         _stations_crs (str) : current crs of the _stations_dataframe
 
         _feature_selection_method_objects (TemplateMethod[]) : Array of TemplateMethod implemented objects
+        _default_method_names (str[]) : names of the methods applied by `select()` when no method_names are given, the other registered methods must be asked for by name
         _last_used_methods (str[]) : last used method names
         _last_used_targets (str[]) : last used targets names
+        _pruning_report (DataFrame | None) : columns dropped by the pruning of the last `select()`, with the reason
+        _geojson_layers (dict(str)) : cache of the serialized stations importance by (target, method), emptied by `select()` and `register_stations()`
+        _report_importances (dict(DataFrame) | None) : importances by method of a report worker (see `_from_report_payload()`), None otherwise
+        _projected_stations (GeoSeries | None) : cache of the stations geometry in Spherical Mercator, emptied by `register_stations()`
+        _basemap_source (TileProvider) : tiles used as background of `plot()` when there is no vector basemap
+        _basemap_cache_dir (str | None) : directory of the downloaded tiles, if None the cache of contextily is used
+        _basemap_geometry (GeoSeries | None) : geometry of the vector basemap in Spherical Mercator, if None tiles are used
+        _basemap_by_zoom (dict(GeoSeries)) : cache of the vector basemap simplified for each zoom level
 
     Example:
     ```python
@@ -75,14 +175,31 @@ class FeatureSelection:
     _stations_crs = None
 
     _feature_selection_method_objects = None
+    _default_method_names = None
     _last_used_methods = None
     _last_used_targets = None
+    _pruning_report = None
+    _geojson_layers = None
+    _report_importances = None
+    _projected_stations = None
+    _basemap_source = None
+    _basemap_cache_dir = None
+    _basemap_geometry = None
+    _basemap_by_zoom = None
 
     def __init__(self):
+        self._geojson_layers = dict()
+        self._basemap_source = ctx.providers.CartoDB.Positron
+        self._basemap_by_zoom = dict()
         self._feature_selection_method_objects = [
             PearsonCorrelation(),
             GrangerCausality(),
+            CrossCorrelation(),
+            MutualInformation(),
+            MRMR(),
+            PCALoadings(),
         ]
+        self._default_method_names = ["PearsonCorrelation", "GrangerCausality"]
 
     def register_stations(
         self,
@@ -130,6 +247,8 @@ class FeatureSelection:
         self._stations_id_column = id_column
         self._stations_get_id_from_sensor_regex = get_id_from_sensor_regex
         self._stations_crs = crs
+        self._geojson_layers = dict()
+        self._projected_stations = None
 
         if geometry_column:
             self._stations_geometry_column = geometry_column
@@ -149,6 +268,76 @@ class FeatureSelection:
             crs=crs,
         )
 
+    def set_basemap(self, vector_path=None, tile_cache_dir=None, source=None):
+        """
+        Choose the background of the maps drawn by `plot()`. By default, CartoDB Positron tiles are downloaded for every map
+
+        Args:
+            vector_path (str | None) : if provided, path of a file readable by geopandas (ie `./data/limites-terrestres.geojson`) drawn as background, nothing is downloaded. It is projected once and simplified once by zoom level
+            tile_cache_dir (str | None) : if provided and no vector_path, directory where the downloaded tiles are stored, so that each tile is only downloaded once (a directory filled beforehand can be used offline). It is given to `contextily.set_cache_dir()` when a map is drawn, so it is also used by the other contextily calls of the process afterwards
+            source (TileProvider | None) : if provided, tiles used when no vector_path is provided
+
+        Example:
+        ```python
+        # Draw the land limits instead of downloading tiles
+        fs.set_basemap(vector_path="./data/limites-terrestres.geojson")
+        ```
+        """
+        self._basemap_by_zoom = dict()
+        self._basemap_geometry = None
+        if vector_path:
+            self._basemap_geometry = (
+                geopandas.read_file(vector_path).to_crs(epsg=3857).geometry
+            )
+        self._basemap_cache_dir = tile_cache_dir
+        if source:
+            self._basemap_source = source
+
+    def _get_projected_stations(self):
+        """
+        Private method. Get the stations geometry in Spherical Mercator (used by the tiles), projected only once
+        """
+        if self._projected_stations is None:
+            self._projected_stations = self._stations_dataframe.geometry.to_crs(
+                epsg=3857
+            )
+        return self._projected_stations
+
+    def _add_basemap(self, ax):
+        """
+        Private method. Draw the background of a map in Spherical Mercator, the vector basemap is simplified to about one pixel at the zoom level of the axe
+
+        Args:
+            ax (Axe) : axe which contains the map
+        """
+        if self._basemap_geometry is None:
+            if self._basemap_cache_dir is not None:
+                # the cache directory of contextily is global to the process, it stays set after the map
+                ctx.set_cache_dir(self._basemap_cache_dir)
+            ctx.add_basemap(ax, source=self._basemap_source)
+            return
+
+        limits = ax.axis()
+        width = max(limits[1] - limits[0], 1)
+        zoom = int(
+            np.clip(
+                np.log2(
+                    EARTH_CIRCUMFERENCE * ax.get_window_extent().width / (256 * width)
+                ),
+                0,
+                20,
+            )
+        )
+        if zoom not in self._basemap_by_zoom:
+            self._basemap_by_zoom[zoom] = self._basemap_geometry.simplify(
+                EARTH_CIRCUMFERENCE / (256 * 2**zoom)
+            )
+        ax.set_facecolor("#d4e4f2")
+        self._basemap_by_zoom[zoom].plot(
+            ax=ax, color="#f2f2ee", edgecolor="#b8b8b8", linewidth=0.5, zorder=0
+        )
+        ax.axis(limits)
+
     def explore_stations(self, **explore_kwargs):
         """
         Explore the different registered stations on an interactive map
@@ -185,15 +374,27 @@ class FeatureSelection:
         return None
 
     def select(
-        self, dataframe, target_columns, method_names=None, number_of_target_to_keep=1
+        self,
+        dataframe,
+        target_columns,
+        method_names=None,
+        number_of_target_to_keep=1,
+        columns=None,
+        prune=False,
+        max_missing_ratio=0.5,
+        duplicate_decimals=None,
     ):
         """
         Apply feature selection methods on target_columns for a given dataframe
 
         Args:
-            dataframe (DataFrame) : dataframe which contains the data used to apply the feature selection. 1 column by feature and 1 line by entry
+            dataframe (DataFrame | SensorStore | PartitionedSensorStore | LaggedFeatures) : dataframe which contains the data used to apply the feature selection. 1 column by feature and 1 line by entry. A store is given as is to the methods which read it chunk by chunk (see `TemplateMethod.supports_store()`), it is loaded once without parsing, only for the used columns, for the other methods and the pruning. Lagged features are given lazily to the methods which support it
             target_columns (str[]) : array of the target column names used to apply the feature selection
-            method_names (str[] | None) : array of the method names to use for feature selection, if None, all registered methods will be applied
+            method_names (str[] | None) : array of the method names to use for feature selection, if None, the default methods (PearsonCorrelation and GrangerCausality) will be applied, see `get_available_methods()` for all the registered methods
+            columns (str[] | None) : if provided, only these columns (and the target_columns) are used as features, otherwise all the columns are used
+            prune (bool) : if True, empty, constant, mostly missing and duplicated columns are dropped before applying the methods (see `get_pruning_report()`), the target columns are always kept. Not applied to lagged features
+            max_missing_ratio (float) : maximum ratio of missing values of a column kept by the pruning
+            duplicate_decimals (int | None) : if provided, values are rounded to this number of decimals to find the duplicated columns, so that near duplicates are dropped too
 
         Example:
         ```python
@@ -201,29 +402,62 @@ class FeatureSelection:
         fs.select(data, target_columns=['pm2_5_station_3', 'no_station_3'], method_names=['PearsonCorrelation'], number_of_target_to_keep=15)
         ```
         """
-        methods = (
-            self._feature_selection_method_objects
-            if not method_names
-            else [
-                method
-                for method in self._feature_selection_method_objects
-                if method.get_method_name() in method_names
-            ]
-        )
+        if not method_names:
+            method_names = self._default_method_names
+        methods = [
+            method
+            for method in self._feature_selection_method_objects
+            if method.get_method_name() in method_names
+        ]
+
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + list(target_columns)))
+        store = None
+        if isinstance(dataframe, (SensorStore, PartitionedSensorStore)):
+            store = None if prune else dataframe
+            # loaded once for the pruning and the methods which cannot read the store chunk by chunk
+            if store is None or not all(method.supports_store() for method in methods):
+                dataframe = dataframe.to_dataframe(columns)
+        elif isinstance(dataframe, LaggedFeatures):
+            if columns is not None:
+                dataframe = dataframe.to_dataframe(columns)
+        elif columns is not None:
+            dataframe = dataframe[columns]
+
+        self._pruning_report = None
+        if prune and not isinstance(dataframe, LaggedFeatures):
+            dataframe, self._pruning_report = prune_columns(
+                dataframe,
+                max_missing_ratio=max_missing_ratio,
+                decimals=duplicate_decimals,
+                keep=target_columns,
+            )
 
         for method in methods:
-            method.select(dataframe, target_columns, number_of_target_to_keep)
+            if store is not None and method.supports_store():
+                method.select_store(
+                    store, target_columns, number_of_target_to_keep, columns
+                )
+            elif isinstance(dataframe, LaggedFeatures):
+                method.select_lagged(
+                    dataframe, target_columns, number_of_target_to_keep
+                )
+            else:
+                method.select(dataframe, target_columns, number_of_target_to_keep)
 
         self._last_used_methods = [method.get_method_name() for method in methods]
         self._last_used_targets = target_columns
+        self._geojson_layers = dict()
 
-    def explore(self, used_target, used_method, **explore_kwargs):
+    def explore(self, used_target, used_method, **map_kwargs):
         """
         Explore the results of the feature selection on an interactive map for a method and a target. Feature selection (`select()`) must be done before
+        The stations of every (target, method) of the last selection are added as switchable layers, only the layer of used_target and used_method is shown at first. The layers are serialized once (see `_get_geojson_layer()`) and reused by the next calls.
 
         Args:
             used_target (str) : the name of the target that we wan't to see (must be referenced in `target_columns` when `select()`)
             used_method (str) : the name of the method that we wan't to see (must be referenced in `method_names` when `select()`, or None used)
+            map_kwargs : arguments given to `folium.Map` (ie `width`, `height`, `zoom_start`)
 
         Example:
         ```python
@@ -231,41 +465,87 @@ class FeatureSelection:
         fs.explore(used_target='pm2_5_station_3', used_method='PearsonCorrelation')
         ```
         """
+        fields = [
+            column
+            for column in [
+                self._stations_name_column,
+                self._stations_id_column,
+                "sensors",
+            ]
+            if column
+        ]
+        map = folium.Map(tiles="CartoDB dark_matter", **map_kwargs)
+        for target in self._last_used_targets:
+            for method in self._last_used_methods:
+                folium.GeoJson(
+                    self._get_geojson_layer(target, method),
+                    name=f"{method} - {target}",
+                    style_function=_station_style,
+                    marker=folium.CircleMarker(fill=True),
+                    tooltip=folium.GeoJsonTooltip(fields=fields, labels=True),
+                    popup=folium.GeoJsonPopup(fields=fields),
+                    show=(target == used_target and method == used_method),
+                ).add_to(map)
+        IMPORTANCE_COLORMAP.add_to(map)
+        folium.LayerControl(collapsed=False).add_to(map)
+
+        min_x, min_y, max_x, max_y = self._stations_dataframe.to_crs(
+            epsg=4326
+        ).total_bounds
+        map.fit_bounds([[min_y, min_x], [max_y, max_x]])
+        return map
 
-        # overide of the stylefunction, should be added soon as a Geopandas feature.
-        @wrapt.patch_function_wrapper(folium, "GeoJson")
-        def new_style(wrapped, instance, args, kwargs):
-            def style_fn(x):
-                return {
-                    "fillColor": x["properties"]["__folium_color"],
-                    "color": x["properties"]["__folium_color"],
-                    "radius": x["properties"]["nb_important_sensors"] + 1,
-                    "fillOpacity": 0.8,
-                }
-
-            if "_style_column" in str(kwargs["style_function"]):
-                kwargs["style_function"] = style_fn
-            return wrapped(*args, **kwargs)
+    def _get_geojson_layer(self, target, method, precision=5):
+        """
+        Private method. Get the stations importance of a target and a method as a GeoJSON string, serialized once and cached until the next `select()` or `register_stations()`.
+        Only the properties used by the map are kept, with the color and the radius of the markers already computed, and the coordinates (EPSG:4326) are rounded to precision decimals (5 decimals is about 1 meter)
 
-        stations_importance = self.get_station_importances(used_target, used_method)
-        map = stations_importance.explore(
-            column="max_importance_value",
-            legend=True,
-            marker_kwds=dict(radius=10, fill=True),
-            vmin=0,
-            vmax=1,
-            tiles="CartoDB dark_matter",
-            tooltip=[self._stations_name_column, self._stations_id_column, "sensors"],
-            popup=[self._stations_name_column, self._stations_id_column, "sensors"],
-            tooltip_kwds=dict(labels=True),
-            **explore_kwargs,
-        )
-        return map
+        Args:
+            target (str) : target name (must be referenced in `target_columns` when `select()`)
+            method (str) : method name (must be referenced in `method_names` when `select()`, or None used)
+            precision (int) : number of decimals of the coordinates
+        """
+        key = (target, method)
+        if key not in self._geojson_layers:
+            stations_importance = self.get_station_importances(target, method).to_crs(
+                epsg=4326
+            )
+            columns = [
+                column
+                for column in [self._stations_name_column, self._stations_id_column]
+                if column
+            ]
+            properties = pd.DataFrame(stations_importance[columns]).astype(str)
+            properties["sensors"] = stations_importance["sensors"]
+            properties["color"] = [
+                IMPORTANCE_COLORMAP(value)
+                for value in stations_importance["max_importance_value"].fillna(0)
+            ]
+            properties["radius"] = stations_importance["nb_important_sensors"] + 1
+
+            features = [
+                {
+                    "type": "Feature",
+                    "properties": feature_properties,
+                    "geometry": _round_coordinates(
+                        geometry.__geo_interface__, precision
+                    ),
+                }
+                for feature_properties, geometry in zip(
+                    properties.to_dict(orient="records"), stations_importance.geometry
+                )
+            ]
+            self._geojson_layers[key] = json.dumps(
+                {"type": "FeatureCollection", "features": features},
+                separators=(",", ":"),
+            )
+        return self._geojson_layers[key]
 
     def plot(self, used_targets=None, used_methods=None):
         """
         Plot the results of the feature selection. Feature selection (`select()`) must be done before.
-        (Cannot plot results for multiple methods and multiple targets at once)
+        (Cannot plot results for multiple methods and multiple targets at once, see `generate_report()`)
+        The background is chosen with `set_basemap()`
 
         Args:
             used_targets (str[] | None) : the name of the targets that we wan't to see (must be referenced in `target_columns` when `select()`). If None, all last used_targets will be used
@@ -350,24 +630,24 @@ class FeatureSelection:
             title (str) : title of the figure
         """
 
-        stations_importance = self.get_station_importances(target, method)
-        stations_importance = stations_importance.to_crs(
-            epsg=3857
-        )  # change to Spherical Mercator to add ctx base map properly
-        features_importance = self.get_feature_importances()
+        # Spherical Mercator to add the base map properly
+        stations_importance = self.get_station_importances(target, method).set_geometry(
+            self._get_projected_stations()
+        )
+        features_importance = self._get_method_importances(method)
         stations_importance.plot(
             ax=ax1,
             column="max_importance_value",
             legend=True,
             markersize=(stations_importance["nb_important_sensors"] * 40 + 5),
-            cmap=plt.cm.get_cmap("plasma"),
+            cmap=matplotlib.colormaps["plasma"],
             vmin=0,
             vmax=1,
         )
         ax1.set_xlabel("Longitude", fontsize=10)
         ax1.set_ylabel("Latitude", fontsize="medium")
         ax1.set_title(title)
-        ctx.add_basemap(ax1, source=ctx.providers.CartoDB.Positron)
+        self._add_basemap(ax1)
         for x, y, label, offsetY in zip(
             stations_importance.geometry.x,
             stations_importance.geometry.y,
@@ -378,25 +658,201 @@ class FeatureSelection:
                 label, xy=(x, y), xytext=(0, offsetY), textcoords="offset points"
             )
 
-        features_importance = (
-            features_importance[method]
-            .dropna()
-            .sort_values(by=[target], ascending=False)
+        features_importance = features_importance.dropna().sort_values(
+            by=[target], ascending=False
         )
         sns.heatmap(
             features_importance[[target]],
             ax=ax2,
             annot=True,
             linewidths=0.5,
-            cmap=plt.cm.get_cmap("plasma"),
+            cmap=matplotlib.colormaps["plasma"],
             cbar=False,
             vmin=0,
             vmax=1,
         )
 
-    def get_feature_importances(self):
+    def generate_report(
+        self,
+        directory,
+        used_targets=None,
+        used_methods=None,
+        n_workers=None,
+        dpi=100,
+        image_format="png",
+    ):
+        """
+        Render the results of the feature selection for every target and every method as separate images, in parallel processes, and write an `index.html` page linking them. Feature selection (`select()`) must be done before.
+        Nothing is displayed, the images are drawn with the Agg backend. The stations are projected and the importances computed before starting the processes, each process only receives them (with the basemap) once, not the feature selection methods.
+
+        Args:
+            directory (str) : directory where the images and the index page are written, created if needed
+            used_targets (str[] | None) : the name of the targets that we want to see. If None, all last used_targets will be used
+            used_methods (str[] | None) : the name of the methods that we want to see. If None, all last used_methods will be used
+            n_workers (int | None) : number of worker processes, if None, one by CPU. With 1, images are rendered in the current process
+            dpi (int) : resolution of the images
+            image_format (str) : format of the images (extension supported by matplotlib)
+
+        Returns:
+            path of the index page
+
+        Example:
+        ```python
+        # Write the results of all the targets and methods in ./report
+        fs.generate_report("./report")
+        ```
+        """
+        if not used_targets:
+            used_targets = self._last_used_targets
+        if not used_methods:
+            used_methods = self._last_used_methods
+        os.makedirs(directory, exist_ok=True)
+
+        # the stations are projected and the importances computed once, the workers only receive what the panels need
+        payload = self._get_report_payload(used_targets, used_methods)
+
+        panels = dict()
+        used_names = set()
+        for target in used_targets:
+            for method in used_methods:
+                name = re.sub(r"[^0-9A-Za-z_.-]", "_", f"{target}__{method}")
+                # distinct targets can have the same sanitized name (ie `a b` and `a_b`)
+                unique_name, number = name, 1
+                while unique_name.lower() in used_names:
+                    number += 1
+                    unique_name = f"{name}_{number}"
+                used_names.add(unique_name.lower())
+                panels[(target, method)] = f"{unique_name}.{image_format}"
+
+        if n_workers == 1:
+            _init_report_worker(payload)
+            for (target, method), name in panels.items():
+                _render_report_panel(target, method, os.path.join(directory, name), dpi)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_report_worker,
+                initargs=(payload,),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _render_report_panel,
+                        target,
+                        method,
+                        os.path.join(directory, name),
+                        dpi,
+                    )
+                    for (target, method), name in panels.items()
+                ]
+                for future in futures:
+                    future.result()
+
+        rows = "\n".join(
+            "<tr><th>{}</th>{}</tr>".format(
+                html.escape(target),
+                "".join(
+                    '<td><a href="{0}"><img src="{0}" width="600"></a></td>'.format(
+                        html.escape(panels[(target, method)])
+                    )
+                    for method in used_methods
+                ),
+            )
+            for target in used_targets
+        )
+        header = "".join(f"<th>{html.escape(method)}</th>" for method in used_methods)
+        index_path = os.path.join(directory, "index.html")
+        with open(index_path, "w", encoding="utf-8") as index:
+            index.write(
+                '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>Feature selection report</title></head>\n<body>\n'
+                f"<table>\n<tr><th></th>{header}</tr>\n{rows}\n</table>\n</body>\n</html>\n"
+            )
+        return index_path
+
+    def _get_report_payload(self, used_targets, used_methods):
+        """
+        Private method. Get what is needed to render the report panels of the targets and methods (stations, importances and basemap), given once to each report worker
+
+        Args:
+            used_targets (str[]) : targets of the report
+            used_methods (str[]) : methods of the report
+        """
+        importances = self.get_feature_importances()
+        return {
+            "stations": self._stations_dataframe,
+            "projected_stations": self._get_projected_stations(),
+            "id_column": self._stations_id_column,
+            "name_column": self._stations_name_column,
+            "get_id_from_sensor_regex": self._stations_get_id_from_sensor_regex,
+            "importances": {
+                method: importances[method][list(used_targets)]
+                for method in used_methods
+            },
+            "basemap_source": self._basemap_source,
+            "basemap_cache_dir": self._basemap_cache_dir,
+            "basemap_geometry": self._basemap_geometry,
+        }
+
+    @classmethod
+    def _from_report_payload(cls, payload):
+        """
+        Private method. Create a feature selection able to render the report panels (`_plot()`) from a payload of `_get_report_payload()`, without feature selection results
+        """
+        feature_selection = cls()
+        feature_selection._stations_dataframe = payload["stations"]
+        feature_selection._projected_stations = payload["projected_stations"]
+        feature_selection._stations_id_column = payload["id_column"]
+        feature_selection._stations_name_column = payload["name_column"]
+        feature_selection._stations_get_id_from_sensor_regex = payload[
+            "get_id_from_sensor_regex"
+        ]
+        feature_selection._report_importances = payload["importances"]
+        feature_selection._basemap_source = payload["basemap_source"]
+        feature_selection._basemap_cache_dir = payload["basemap_cache_dir"]
+        feature_selection._basemap_geometry = payload["basemap_geometry"]
+        return feature_selection
+
+    def _get_method_importances(self, method):
+        """
+        Private method. Get the features importance of a method (see `get_feature_importances()`), or the importances given to a report worker
+
+        Args:
+            method (str) : method name
+        """
+        if self._report_importances is not None:
+            return self._report_importances[method]
+        return self.get_feature_importances()[method]
+
+    def get_pruning_report(self):
+        """
+        Get the columns dropped by the pruning of the last `select()` (None if the pruning was not used), with the `reason` (`empty`, `constant`, `missing` or `duplicate`) and the column a duplicate is equal to (`duplicate_of`)
+        """
+        return self._pruning_report
+
+    def _map_pruned_columns(self, importances):
+        """
+        Private method. Add the columns dropped by the pruning to an importance dataframe: a duplicate gets the importances of the column it is equal to, the other dropped columns get NaN
+
+        Args:
+            importances (DataFrame) : importances of the kept columns, 1 line by feature
+        """
+        report = self._pruning_report
+        dropped = pd.DataFrame(
+            np.nan, index=report.index, columns=importances.columns, dtype=float
+        )
+        duplicates = report.index[
+            report["duplicate_of"].isin(importances.index).to_numpy()
+        ]
+        dropped.loc[duplicates] = importances.loc[
+            report.loc[duplicates, "duplicate_of"]
+        ].to_numpy()
+        return pd.concat([importances, dropped])
+
+    def get_feature_importances(self, top_k=None):
         """
-        Get the features importance. Feature selection (`select()`) must be done before
+        Get the features importance. Feature selection (`select()`) must be done before. The columns dropped by the pruning are added back (see `_map_pruned_columns()`)
+
+        Args:
+            top_k (int | None) : if provided, the importances of each method are given as a compact `TopKScores` keeping the top_k best features of each target (without the pruned columns), otherwise as dense dataframes
         """
         method_names = self._last_used_methods
 
@@ -412,7 +868,14 @@ class FeatureSelection:
         return dict(
             zip(
                 [method.get_method_name() for method in methods],
-                [method.get_feature_importances() for method in methods],
+                [
+                    (
+                        method.get_feature_importances(top_k)
+                        if self._pruning_report is None or top_k is not None
+                        else self._map_pruned_columns(method.get_feature_importances())
+                    )
+                    for method in methods
+                ],
             )
         )
 
@@ -453,28 +916,36 @@ class FeatureSelection:
             method (str) : method name (must be referenced in `method_names` when `select()`, or None used)
         """
         stations_importance = self._stations_dataframe.copy()
-        stations_importance["nb_important_sensors"] = 0
-        stations_importance["max_importance_value"] = 0
-        stations_importance["sensors"] = ""
-        score = self.get_feature_importances()[method]
-        for index in score.index:
-            x = re.search(self._stations_get_id_from_sensor_regex, index)
-            if x:
-                station_id = int(x.group(1))
-                importance_value = score[target][index]
-                stations_importance.loc[
-                    stations_importance[self._stations_id_column] == station_id,
-                    "nb_important_sensors",
-                ] += 1
-                stations_importance.loc[
-                    stations_importance[self._stations_id_column] == station_id,
-                    "sensors",
-                ] += f"{index} : {'{:.2f}'.format(importance_value)}\n</br>"
-                stations_importance.loc[
-                    (stations_importance[self._stations_id_column] == station_id)
-                    & (stations_importance["max_importance_value"] < importance_value),
-                    "max_importance_value",
-                ] = importance_value
+        score = self._get_method_importances(method)[target]
+
+        # sensors of each station, found with the regex on all the features at once
+        station_ids = score.index.to_series().str.extract(
+            self._stations_get_id_from_sensor_regex, expand=False
+        )
+        if isinstance(station_ids, pd.DataFrame):
+            station_ids = station_ids.iloc[:, 0]
+        found = station_ids.notna().to_numpy()
+        sensors = pd.DataFrame(
+            {
+                "station_id": station_ids[found].astype(int).to_numpy(),
+                "value": score[found].to_numpy(),
+                "text": [
+                    f"{index} : {'{:.2f}'.format(value)}\n</br>"
+                    for index, value in score[found].items()
+                ],
+            }
+        ).groupby("station_id", sort=False)
+
+        station_column = stations_importance[self._stations_id_column]
+        stations_importance["nb_important_sensors"] = (
+            station_column.map(sensors.size()).fillna(0).astype(int)
+        )
+        stations_importance["max_importance_value"] = (
+            station_column.map(sensors["value"].max()).fillna(0).clip(lower=0)
+        )
+        stations_importance["sensors"] = station_column.map(
+            sensors["text"].agg("".join)
+        ).fillna("")
 
         return stations_importance
 
@@ -0,0 +1,126 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      CrossCorrelation.py                                ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:26:37 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+
+import numpy as np
+import pandas as pd
+from scipy import fft
+
+
+class CrossCorrelation(TemplateMethod):
+    """
+    CrossCorrelation is a class which implements the TemplateMethods in order to implement a lagged cross-correlation feature selection.
+    Each feature is correlated with each target at every lag from 0 to max_lag (the feature leading the target), the score is the peak absolute correlation.
+    All the lags are computed at once with batched real FFTs, missing values are handled by computing every correlation only on the records where both values are known.
+
+    Args:
+        max_lag (int) : maximum lag (in records) between a feature and a target
+
+    Attributes:
+        _max_lag (int) : maximum lag (in records) between a feature and a target
+        _best_lags (DataFrame) : Dataframe with the same shape as _score containing the lag where the peak correlation is reached
+    """
+
+    _max_lag = None
+    _best_lags = None
+
+    def __init__(self, max_lag=24):
+        TemplateMethod.__init__(self, "CrossCorrelation")
+        self._max_lag = max_lag
+
+    def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        correlations = self.cross_correlation(
+            dataframe.to_numpy(dtype=float, na_value=np.nan),
+            dataframe[target_columns].to_numpy(dtype=float, na_value=np.nan),
+            self._max_lag,
+        )
+        absolute_correlations = np.nan_to_num(np.abs(correlations), nan=-1)
+        best_lags = absolute_correlations.argmax(axis=2)
+        scores = np.take_along_axis(absolute_correlations, best_lags[..., None], 2)
+        scores = np.where(scores[..., 0] < 0, np.nan, scores[..., 0])
+
+        self._score = pd.DataFrame(
+            scores, index=dataframe.columns, columns=target_columns
+        )
+        self._best_lags = pd.DataFrame(
+            best_lags, index=dataframe.columns, columns=target_columns
+        )
+
+        self._select_best_features(number_of_target_to_keep)
+
+    def cross_correlation(self, X, Y, max_lag):
+        """
+        Compute the lagged Pearson correlation between x[t - lag] and y[t] for every column x of X, every column y of Y and every lag from 0 to max_lag.
+        Each correlation only uses the records where both values are known.
+
+        Args:
+            X (ndarray) : features array of shape (n_records, n_features), can contain np.nan
+            Y (ndarray) : targets array of shape (n_records, n_targets), can contain np.nan
+            max_lag (int) : maximum lag
+
+        Returns:
+            ndarray of shape (n_features, n_targets, max_lag + 1)
+        """
+        n_records = X.shape[0]
+        # zero padding up to n_records + max_lag avoids the circular wrap of the FFT
+        n_fft = fft.next_fast_len(n_records + max_lag, real=True)
+
+        def spectrums(A):
+            valid = ~np.isnan(A)
+            A = np.where(valid, A - np.nanmean(A, axis=0), 0)
+            return (
+                fft.rfft(valid.astype(float), n=n_fft, axis=0, workers=-1).T,
+                fft.rfft(A, n=n_fft, axis=0, workers=-1).T,
+                fft.rfft(A**2, n=n_fft, axis=0, workers=-1).T,
+            )
+
+        valid_x, x, xx = spectrums(X)
+        valid_x, x, xx = valid_x.conj(), x.conj(), xx.conj()
+        valid_y, y, yy = spectrums(Y)
+
+        def lagged_sums(A, B):
+            # sum_t a[t - lag] * b[t] for all the feature/target pairs and lags 0..max_lag, one target at a time to bound the memory
+            sums = np.empty((A.shape[0], B.shape[0], max_lag + 1))
+            for j in range(B.shape[0]):
+                sums[:, j, :] = fft.irfft(A * B[j], n=n_fft, axis=1, workers=-1)[
+                    :, : max_lag + 1
+                ]
+            return sums
+
+        n = np.round(lagged_sums(valid_x, valid_y))
+        sum_x = lagged_sums(x, valid_y)
+        sum_y = lagged_sums(valid_x, y)
+        sum_xx = lagged_sums(xx, valid_y)
+        sum_yy = lagged_sums(valid_x, yy)
+        sum_xy = lagged_sums(x, y)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance_x = n * sum_xx - sum_x**2
+            variance_y = n * sum_yy - sum_y**2
+            correlation = (n * sum_xy - sum_x * sum_y) / np.sqrt(
+                variance_x * variance_y
+            )
+        # FFT round-off leaves tiny non-zero variances for constant series
+        constant = (variance_x <= 1e-10 * n * sum_xx) | (
+            variance_y <= 1e-10 * n * sum_yy
+        )
+        correlation[(n < 2) | constant] = np.nan
+        return np.clip(correlation, -1, 1)
+
+    def get_best_lags(self):
+        """
+        Accessor to the _best_lags variable
+        """
+        return self._best_lags
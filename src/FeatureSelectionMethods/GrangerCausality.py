@@ -8,18 +8,26 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/06/16 17:51:15 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/19 00:06:26 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
-from src.scripts.utils import stationary_dataframe, symmetrize
+from src.MissingnessIndex import MissingnessIndex
+from src.scripts.utils import (
+    blockwise_matrix,
+    nan_correlation,
+    stationary_dataframe,
+    symmetrize,
+    symmetrize_blockwise,
+)
 
-from statsmodels.tsa.stattools import grangercausalitytests
-from statsmodels.tsa.api import VAR
+from scipy.stats import chi2, f as f_distribution
 
 from sklearn_extra.cluster import KMedoids
 
+import time
+
 import numpy as np
 import pandas as pd
 
@@ -28,10 +36,76 @@ class GrangerCausality(TemplateMethod):
     """
     GrangerCausality is a class which implements the TemplateMethods in order to implement the Granger Causality feature selection
     Explaned in the paper [GFSM: a Feature Selection Method for Improving Time Series Forecasting](https://hal.archives-ouvertes.fr/hal-02448277/document)
+
+    With `screening=True`, `select()` only looks for the significant pairs: a cheap cross-correlation prefilter first rejects the pairs which look clearly non-causal, and the exact p-values are only computed for the remaining pairs (the rejected pairs and the pairs above alpha get a p-value of 1). The prefilter is a heuristic, not a bound of the exact test: a rejected pair can be significant in the full causation matrix, so the screening can change the selection. The default bound_alpha is loose to keep this recall loss low, `compare_screening()` reports the pairs lost on a given dataset.
+
+    With a `coarse_frequency`, `select()` works coarse-to-fine: the causation matrix is first computed on the data resampled (mean) at this frequency, the pairs above `coarse_alpha` are pruned (p-value of 1), and only the remaining pairs are computed at full resolution. The pruning is lossy: a pair pruned at the coarse frequency can be significant at full resolution, the lower coarse_alpha, the more pairs are pruned (and the faster the selection) and the more significant pairs can be lost. A coarse_alpha close to 1 prunes almost nothing and is slower than a full resolution selection (the coarse pass is added). `compare_resolutions()` reports the speed-up and the difference with a full resolution selection.
+
+    The causality can also be followed online (`start_online()`, `update_online()`): for each (feature, target) pair, the restricted and unrestricted models of the test are kept as recursive least squares with a forgetting factor, so the F-test is refreshed in O(lag²) by new record.
+
+    Args:
+        screening (bool) : if True, use the screening mode in `select()`
+        alpha (float) : significance level of the screening
+        lags (int[]) : lags of the cross-correlations summed by the prefilter
+        bound_alpha (float) : significance level of the prefilter, pairs above it at every lag are rejected without being tested
+        coarse_frequency (str | None) : if provided, pandas frequency (ie `6H`, `D`) of the coarse pass of `select()`, the dataframe needs a DatetimeIndex
+        coarse_alpha (float) : pairs with a coarse p-value above it are not refined
+        random_state (int | None) : seed of the KMedoids initialisation, if None, the clusters (and the selected features) can change from a run to the other
+        memory_budget (int | None) : if provided, the causation matrix of `select()` is computed and symmetrized in float32 by tiles of this size (in bytes), in the memory-mapped score_path, so that the matrix is never fully in memory. The KMedoids clustering reads the memory-mapped matrix and is not bounded by the budget (its temporary arrays grow with the size of the clusters). Only used without screening and coarse_frequency
+        score_path (str | None) : path of the npy file where the causation matrix is memory-mapped, required with memory_budget
+
+    Attributes:
+        _screening (bool) : if True, use the screening mode in `select()`
+        _alpha (float) : significance level of the screening
+        _lags (int[]) : lags of the cross-correlations summed by the prefilter
+        _bound_alpha (float) : significance level of the prefilter
+        _significant_pairs (DataFrame | None) : significant pairs found by the last screening
+        _coarse_frequency (str | None) : frequency of the coarse pass
+        _coarse_alpha (float) : pairs with a coarse p-value above it are not refined
+        _coarse_report (dict | None) : durations and number of refined pairs of the last coarse-to-fine selection
+        _random_state (int | None) : seed of the KMedoids initialisation
+        _memory_budget (int | None) : memory (in bytes) used by a tile of the causation matrix
+        _score_path (str | None) : path of the npy file where the causation matrix is memory-mapped
+        _online (dict | None) : state of the online causality, None if `start_online()` has not been called
     """
 
-    def __init__(self):
+    _screening = None
+    _alpha = None
+    _lags = None
+    _bound_alpha = None
+    _significant_pairs = None
+    _coarse_frequency = None
+    _coarse_alpha = None
+    _coarse_report = None
+    _random_state = None
+    _memory_budget = None
+    _score_path = None
+    _online = None
+
+    def __init__(
+        self,
+        screening=False,
+        alpha=0.05,
+        lags=(1, 2, 3, 4, 5, 6),
+        bound_alpha=0.9,
+        coarse_frequency=None,
+        coarse_alpha=0.2,
+        random_state=None,
+        memory_budget=None,
+        score_path=None,
+    ):
         TemplateMethod.__init__(self, "GrangerCausality")
+        if memory_budget and score_path is None:
+            raise ValueError("score_path is required with a memory_budget")
+        self._screening = screening
+        self._alpha = alpha
+        self._lags = list(lags)
+        self._bound_alpha = bound_alpha
+        self._coarse_frequency = coarse_frequency
+        self._coarse_alpha = coarse_alpha
+        self._random_state = random_state
+        self._memory_budget = memory_budget
+        self._score_path = score_path
 
     def select(self, dataframe, target_columns, number_of_target_to_keep=1):
 
@@ -39,31 +113,147 @@ class GrangerCausality(TemplateMethod):
         df, _ = stationary_dataframe(dataframe)
 
         # compute granger causality matrix
-        lagrange_matrix = self.grangers_causation_matrix(
-            df, df.columns, test="ssr_ftest"
-        )
+        if self._coarse_frequency:
+            lagrange_matrix = self.coarse_to_fine_matrix(
+                dataframe, df, self._coarse_frequency, self._coarse_alpha
+            )
+        elif self._screening:
+            self._significant_pairs = self.granger_screening(
+                df, df.columns, self._alpha, self._lags, self._bound_alpha
+            )
+            lagrange_matrix = self.screening_matrix(self._significant_pairs, df.columns)
+        else:
+            lagrange_matrix = self.grangers_causation_matrix(
+                df,
+                df.columns,
+                test="ssr_ftest",
+                memory_budget=self._memory_budget,
+                path=self._score_path,
+            )
 
         # make the matrix symmetric using the max function agg
-        lgm = symmetrize(lagrange_matrix)
-        lgm_df = pd.DataFrame(lgm, columns=df.columns, index=df.columns)
+        if self._memory_budget and not (self._coarse_frequency or self._screening):
+            # in place in the memory-mapped matrix, by tiles fitting in the budget
+            lgm = symmetrize_blockwise(
+                lagrange_matrix.to_numpy(),
+                max(1, int(np.sqrt(self._memory_budget / 16))),
+            )
+        else:
+            lgm = symmetrize(lagrange_matrix)
+        lgm_df = pd.DataFrame(lgm, columns=df.columns, index=df.columns, copy=False)
 
         # clustering using KMedoid
         KMobj = KMedoids(
             n_clusters=number_of_target_to_keep,
             metric="precomputed",
             init="k-medoids++",
+            random_state=self._random_state,
         ).fit(lgm)
         clusters = KMobj.labels_
 
-        self._selected_features = dict()
-        for target_column in target_columns:
-            self._selected_features[target_column] = self.gfsm_features(
-                lgm_df, clusters, target_column
-            )
+        self._selected_features = self.gfsm_targets_features(
+            lgm_df, clusters, target_columns
+        )
         self._score = lgm_df[target_columns]
 
+    def coarse_to_fine_matrix(self, dataframe, df, frequency, coarse_alpha):
+        """
+        Granger causality matrix computed coarse-to-fine: on the dataframe resampled at the frequency first, then at full resolution for the pairs with a coarse p-value below coarse_alpha only
+
+        Args:
+            dataframe (DataFrame) : raw dataframe, with a DatetimeIndex
+            df (DataFrame) : stationary version of dataframe
+            frequency (str) : pandas frequency of the coarse pass
+            coarse_alpha (float) : pairs with a coarse p-value above it are not refined
+        """
+        start = time.perf_counter()
+        coarse_df, _ = stationary_dataframe(dataframe.resample(frequency).mean())
+        coarse_matrix = self.grangers_causation_matrix(
+            coarse_df, df.columns, test="ssr_ftest"
+        )
+        mask = coarse_matrix.to_numpy() <= coarse_alpha
+        np.fill_diagonal(mask, False)
+        coarse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = self.grangers_causation_matrix(
+            df, df.columns, test="ssr_ftest", mask=mask
+        )
+        self._coarse_report = {
+            "coarse_time": coarse_time,
+            "fine_time": time.perf_counter() - start,
+            "refined_pairs": int(mask.sum()),
+            "pairs": len(df.columns) * (len(df.columns) - 1),
+        }
+        return matrix
+
+    def compare_resolutions(
+        self, dataframe, target_columns, number_of_target_to_keep=1
+    ):
+        """
+        Run the selection at full resolution and coarse-to-fine, and compare them. The method keeps the coarse-to-fine selection.
+        Both selections use the same KMedoids initialisation (the random_state of the method, 0 if None), so that the overlap only measures the cost of the coarse pruning
+
+        Args:
+            dataframe (DataFrame) : dataframe with a DatetimeIndex, 1 column by feature and 1 line by entry
+            target_columns (str[]) : array of the target column names
+            number_of_target_to_keep (int) : number of features to keep
+
+        Returns:
+            dict with the durations (`full_time`, `coarse_to_fine_time`), the `speed_up`, the share of refined pairs, and the `overlap` (Series, Jaccard index between the selected features of each target)
+        """
+        coarse_frequency = self._coarse_frequency
+        random_state = self._random_state
+        if random_state is None:
+            self._random_state = 0
+        try:
+            self._coarse_frequency = None
+            start = time.perf_counter()
+            self.select(dataframe, target_columns, number_of_target_to_keep)
+            full_time = time.perf_counter() - start
+            full_features = self.get_selected_features()
+
+            self._coarse_frequency = coarse_frequency
+            start = time.perf_counter()
+            self.select(dataframe, target_columns, number_of_target_to_keep)
+            coarse_to_fine_time = time.perf_counter() - start
+            coarse_features = self.get_selected_features()
+        finally:
+            self._coarse_frequency = coarse_frequency
+            self._random_state = random_state
+
+        overlap = pd.Series(
+            {
+                target: len(set(full_features[target]) & set(coarse_features[target]))
+                / len(set(full_features[target]) | set(coarse_features[target]))
+                for target in target_columns
+            }
+        )
+        return {
+            "full_time": full_time,
+            "coarse_to_fine_time": coarse_to_fine_time,
+            "speed_up": full_time / coarse_to_fine_time,
+            "refined_pairs": self._coarse_report["refined_pairs"]
+            / self._coarse_report["pairs"],
+            "overlap": overlap,
+        }
+
+    def get_coarse_report(self):
+        """
+        Accessor to the _coarse_report variable
+        """
+        return self._coarse_report
+
     def grangers_causation_matrix(
-        self, data, variables, test="ssr_ftest", maxlag=10, verbose=False
+        self,
+        data,
+        variables,
+        test="ssr_ftest",
+        maxlag=10,
+        verbose=False,
+        mask=None,
+        memory_budget=None,
+        path=None,
     ):
         """Check Granger Causality of all possible combinations of the Time series.
         The rows are the response variable, columns are predictors. The values in the table
@@ -74,7 +264,16 @@ class GrangerCausality(TemplateMethod):
         Args:
             data (DataFrame)     : pandas dataframe containing the time series variables
             variables : list containing names of the time series variables.
+            mask (ndarray | None) : if provided, boolean array (response, predictor) of the pairs to compute, the other pairs get a p-value of 1
+            memory_budget (int | None) : if provided, the matrix is computed in float32 by tiles of this size (in bytes)
+            path (str | None) : path of the npy file where the matrix is memory-mapped, required with memory_budget
         """
+        if memory_budget:
+            if path is None:
+                raise ValueError("path is required with a memory_budget")
+            return self._blockwise_causation_matrix(
+                data, variables, test, verbose, mask, memory_budget, path
+            )
 
         # TODO: assert dataframe is stationary
         df = pd.DataFrame(
@@ -84,25 +283,16 @@ class GrangerCausality(TemplateMethod):
         )
 
         # maxlag = int((data.shape[0]  - 1)  / (2 * (data.shape[1] + 1)))
+        values = data[list(variables)].to_numpy(dtype=float, na_value=np.nan)
+        missingness = MissingnessIndex(data[list(variables)])
 
-        for c in df.columns:
-            for r in df.index:
+        for j, c in enumerate(df.columns):
+            for i, r in enumerate(df.index):
 
-                if c != r:
-                    # Computing the lag order
-                    # check for stationarity
-                    df_c_r, _ = stationary_dataframe(data[[r, c]])
-                    lag = self.var_lag_order(df_c_r)
-                    test_result = grangercausalitytests(
-                        df_c_r, maxlag=lag, verbose=False
+                if c != r and (mask is None or mask[i, j]):
+                    df.loc[r, c] = self.pair_p_value(
+                        data, r, c, test, verbose, missingness, values
                     )
-                    p_values = [
-                        round(test_result[i + 1][0][test][1], 4) for i in range(lag)
-                    ]
-                    min_p_value = np.min(p_values)
-                    if verbose:
-                        print(f"Y = {r}, X = {c}, P Values = {p_values}")
-                    df.loc[r, c] = min_p_value
 
                 else:
                     df.loc[r, c] = 1
@@ -112,26 +302,410 @@ class GrangerCausality(TemplateMethod):
 
         return df
 
-    def var_lag_order(self, dataframe, criterion="aic"):
+    def _blockwise_causation_matrix(
+        self, data, variables, test, verbose, mask, memory_budget, path
+    ):
+        """
+        Private method. Granger causality matrix computed by tiles fitting in the memory budget, in the memory-mapped file at path
+        """
+        variables = list(variables)
+        values = data[variables].to_numpy(dtype=float, na_value=np.nan)
+        missingness = MissingnessIndex(data[variables])
+
+        def score_tile(rows, columns):
+            tile = np.ones((len(rows), len(columns)), dtype=np.float32)
+            for j, c in enumerate(columns):
+                for i, r in enumerate(rows):
+                    if c != r and (mask is None or mask[r, c]):
+                        tile[i, j] = self.pair_p_value(
+                            data,
+                            variables[r],
+                            variables[c],
+                            test,
+                            verbose,
+                            missingness,
+                            values,
+                        )
+            return tile
+
+        matrix, _ = blockwise_matrix(
+            score_tile,
+            (len(variables), len(variables)),
+            max(1, int(np.sqrt(memory_budget / 4))),
+            path=path,
+        )
+        return pd.DataFrame(
+            matrix,
+            columns=[var + "_x" for var in variables],
+            index=[var + "_y" for var in variables],
+            copy=False,
+        )
+
+    def pair_p_value(
+        self,
+        data,
+        r,
+        c,
+        test="ssr_ftest",
+        verbose=False,
+        missingness=None,
+        values=None,
+    ):
+        """
+        Exact p-value of the causality of c on r, as in the Granger causality matrix: minimum of the rounded p-values at every lag up to the VAR lag order of the pair
+        The pair is not spliced around its missing records: the number of differentiations is found by ADF tests on its longest segment of known records (the only part copied), then the differentiated series, the VAR lag order and the tests only use the records t whose values are known from t - lag - n_diff to t (see `MissingnessIndex.get_lagged_rows()`), so that no difference nor lag spans an outage
+
+        Args:
+            data (DataFrame) : pandas dataframe containing the time series variables
+            r (str) : response variable
+            c (str) : predictor variable
+            test (str) : `ssr_ftest`, `params_ftest`, `ssr_chi2test` or `lrtest`, as in grangercausalitytests
+            missingness (MissingnessIndex | None) : bitmap of the known values of data, built for the pair if not provided
+            values (ndarray | None) : values of the columns of missingness, gathered once by the caller, if not provided the pair is read from data
+
+        Returns:
+            the p-value, 1 if the pair has not enough known records
+        """
+        p_values = self.pair_lag_p_values(data, r, c, test, missingness, values)
+        min_p_value = np.nan_to_num(np.nanmin(p_values + [np.nan, 1]), nan=1)
+        if verbose:
+            print(f"Y = {r}, X = {c}, P Values = {p_values}")
+        return min_p_value
+
+    def pair_lag_p_values(
+        self, data, r, c, test="ssr_ftest", missingness=None, values=None
+    ):
+        """
+        Rounded p-values of the causality of c on r at every lag up to the VAR lag order of the pair (see `pair_p_value()`)
+
+        Args:
+            data (DataFrame) : pandas dataframe containing the time series variables
+            r (str) : response variable
+            c (str) : predictor variable
+            test (str) : `ssr_ftest`, `params_ftest`, `ssr_chi2test` or `lrtest`, as in grangercausalitytests
+            missingness (MissingnessIndex | None) : bitmap of the known values of data, built for the pair if not provided
+            values (ndarray | None) : values of the columns of missingness, gathered once by the caller, if not provided the pair is read from data
+
+        Returns:
+            list of the p-values at the lags 1 to the lag order, empty if the pair has not enough known records
+        """
+        if missingness is None or values is None:
+            missingness = MissingnessIndex(data[[r, c]])
+            values = data[[r, c]].to_numpy(dtype=float, na_value=np.nan)
+        y = values[:, missingness.get_position(r)]
+        x = values[:, missingness.get_position(c)]
+        # the bitmap of the pair is unpacked once, the records usable with k lags are run_lengths > k
+        run_lengths = missingness.get_run_lengths([r, c])
+
+        # check for stationarity on the longest segment, which has no gap to difference across
+        end = int(np.argmax(run_lengths)) + 1 if len(run_lengths) else 0
+        if end == 0 or run_lengths[end - 1] < 2:
+            return []
+        start = end - run_lengths[end - 1]
+        _, n_diff = stationary_dataframe(
+            pd.DataFrame({0: y[start:end], 1: x[start:end]})
+        )
+        if n_diff:
+            y = np.concatenate([np.full(n_diff, np.nan), np.diff(y, n_diff)])
+            x = np.concatenate([np.full(n_diff, np.nan), np.diff(x, n_diff)])
+
+        # an order of 0 can be selected for white noise, the test needs at least 1 lag
+        lag = max(self.pair_lag_order(y, x, run_lengths, n_diff), 1)
+        return [
+            round(
+                self.granger_test(
+                    y,
+                    x,
+                    k,
+                    np.flatnonzero(run_lengths > k + n_diff),
+                    test,
+                ),
+                4,
+            )
+            for k in range(1, lag + 1)
+        ]
+
+    def pair_lag_order(self, y, x, run_lengths, n_diff=0):
+        """
+        VAR lag order of a pair selected by the AIC criterion with `var_lag_order()`, only on the records whose lags are known
+
+        Args:
+            y (ndarray) : response series, differentiated n_diff times
+            x (ndarray) : predictor series, differentiated n_diff times
+            run_lengths (ndarray) : run lengths of the known records of the pair before differentiation (see `MissingnessIndex.get_run_lengths()`)
+            n_diff (int) : number of differentiations of the series
+        """
+        return self.var_lag_order(
+            np.column_stack([y, x]), run_lengths=run_lengths, n_diff=n_diff
+        )
+
+    def granger_screening(
+        self,
+        data,
+        variables,
+        alpha=0.05,
+        lags=(1, 2, 3, 4, 5, 6),
+        bound_alpha=0.9,
+        test="ssr_ftest",
+        verbose=False,
+    ):
+        """
+        Screening version of the Granger causality matrix, only looking for the significant pairs.
+        1. prefilter: every series is prewhitened by an AR model, and the Haugh statistic (n times the sum of the squared cross-correlations of the residuals up to each lag, asymptotically chi² under the null hypothesis) is computed for all the pairs at once with matrix products. Pairs whose prefilter p-value is above bound_alpha at every lag are rejected.
+        The prefilter is a heuristic and not a bound of the exact test (which differentiates each pair and selects its lag order on its own), a rejected pair can be significant in `grangers_causation_matrix()`: the lower bound_alpha, the more pairs are rejected and the more significant pairs can be lost (see `compare_screening()`).
+        The records usable by the prefilter are taken from a single bitmap of the known values (`MissingnessIndex`), the records whose lags are not all known are skipped instead of being dropped and concatenated.
+        2. the exact p-values (`pair_lag_p_values()`, as in `pair_p_value()`) are computed for the remaining pairs, the pairs below alpha are kept.
+
+        Args:
+            data (DataFrame) : pandas dataframe containing the stationary time series variables
+            variables : list containing names of the time series variables.
+            alpha (float) : significance level
+            lags (int[]) : lags of the cross-correlations summed by the prefilter
+            bound_alpha (float) : significance level of the prefilter
+
+        Returns:
+            DataFrame indexed by (response, predictor) with, for each significant pair, the first significant `lag` and the exact `p_value`
+        """
+        variables = list(variables)
+        values = data[variables].to_numpy(dtype=float, na_value=np.nan)
+        max_lag = max(lags)
+
+        missingness = MissingnessIndex(data[variables])
+
+        # 1. prefilter, statistics[k - 1, r, c] for the lags of c up to k
+        residuals = self.prewhiten(values, max_lag, missingness)
+        valid = (~np.isnan(residuals)).astype(float)
+        statistics = np.zeros((max_lag, len(variables), len(variables)))
+        for k in range(1, max_lag + 1):
+            n = valid[k:].T @ valid[:-k]
+            correlation = nan_correlation(residuals[k:], residuals[:-k])
+            statistics[k - 1] = n * np.nan_to_num(correlation) ** 2
+        statistics = np.cumsum(statistics, axis=0)
+        bound_p_values = chi2.sf(
+            statistics[np.array(lags) - 1], np.array(lags)[:, None, None]
+        )
+        candidates = (bound_p_values <= bound_alpha).any(axis=0)
+        np.fill_diagonal(candidates, False)
+
+        # 2. exact p-values of the remaining pairs
+        significant_pairs = []
+        for r, c in zip(*np.nonzero(candidates)):
+            p_values = self.pair_lag_p_values(
+                data, variables[r], variables[c], test, missingness, values
+            )
+            significant = np.flatnonzero(np.array(p_values) < alpha)
+            if len(significant):
+                significant_pairs.append(
+                    (r, c, significant[0] + 1, np.nanmin(p_values))
+                )
+        if verbose:
+            print(
+                f"{candidates.sum()} pairs kept by the prefilter, {len(significant_pairs)} significant pairs"
+            )
+
+        return pd.DataFrame(
+            {
+                "lag": [lag for _, _, lag, _ in significant_pairs],
+                "p_value": [p_value for _, _, _, p_value in significant_pairs],
+            },
+            index=pd.MultiIndex.from_tuples(
+                [(variables[r], variables[c]) for r, c, _, _ in significant_pairs],
+                names=["response", "predictor"],
+            ),
+        )
+
+    def compare_screening(self, dataframe, alpha=None, bound_alpha=None):
+        """
+        Check the recall of the screening on a dataset: compute the full causation matrix and the screening, and find the pairs significant in the full matrix which are lost by the screening. The screened matrix keeps every significant pair when `lost_pairs` is empty.
+
+        Args:
+            dataframe (DataFrame) : dataframe, 1 column by feature and 1 line by entry
+            alpha (float | None) : significance level, if None, the one of the method
+            bound_alpha (float | None) : significance level of the prefilter, if None, the one of the method
+
+        Returns:
+            dict with the durations (`full_time`, `screening_time`), the `speed_up`, the number of `significant_pairs` in the full matrix, and the `lost_pairs` (DataFrame indexed by (response, predictor) with their `p_value` in the full matrix)
+        """
+        alpha = self._alpha if alpha is None else alpha
+        bound_alpha = self._bound_alpha if bound_alpha is None else bound_alpha
+        df, _ = stationary_dataframe(dataframe)
+        variables = list(df.columns)
+
+        start = time.perf_counter()
+        full = self.grangers_causation_matrix(df, variables).to_numpy()
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        screened = self.screening_matrix(
+            self.granger_screening(df, variables, alpha, self._lags, bound_alpha),
+            variables,
+        ).to_numpy()
+        screening_time = time.perf_counter() - start
+
+        responses, predictors = np.nonzero((full < alpha) & ~(screened < alpha))
+        return {
+            "full_time": full_time,
+            "screening_time": screening_time,
+            "speed_up": full_time / screening_time,
+            "significant_pairs": int((full < alpha).sum()),
+            "lost_pairs": pd.DataFrame(
+                {"p_value": full[responses, predictors]},
+                index=pd.MultiIndex.from_arrays(
+                    [
+                        [variables[r] for r in responses],
+                        [variables[c] for c in predictors],
+                    ],
+                    names=["response", "predictor"],
+                ),
+            ),
+        }
+
+    def screening_matrix(self, significant_pairs, variables):
+        """
+        Dense Granger causality matrix (same format as `grangers_causation_matrix()`) from the significant pairs of a screening, the other pairs get a p-value of 1
+
+        Args:
+            significant_pairs (DataFrame) : result of `granger_screening()`
+            variables : list containing names of the time series variables.
+        """
+        variables = list(variables)
+        matrix = np.ones((len(variables), len(variables)))
+        responses = [
+            variables.index(r) for r in significant_pairs.index.get_level_values(0)
+        ]
+        predictors = [
+            variables.index(c) for c in significant_pairs.index.get_level_values(1)
+        ]
+        matrix[responses, predictors] = significant_pairs["p_value"].to_numpy()
+        return pd.DataFrame(
+            matrix,
+            columns=[var + "_x" for var in variables],
+            index=[var + "_y" for var in variables],
+        )
+
+    def prewhiten(self, values, lag, missingness=None):
+        """
+        Residuals of an AR(lag) model with constant fitted on each column, np.nan where the residual can not be computed
+
+        Args:
+            values (ndarray) : array of shape (n_records, n_columns), can contain np.nan
+            lag (int) : order of the AR models
+            missingness (MissingnessIndex | None) : bitmap of the known values of values (with the same columns), built if not provided
+        """
+        if missingness is None:
+            missingness = MissingnessIndex(values)
+        residuals = np.full(values.shape, np.nan)
+        for i, column in enumerate(missingness.get_columns()):
+            rows = missingness.get_lagged_rows([column], lag)
+            y, z = self.lagged_design(values[:, i], None, lag, rows)
+            if len(rows) > z.shape[1]:
+                coefficients = np.linalg.lstsq(z, y, rcond=None)[0]
+                residuals[rows, i] = y - z @ coefficients
+        return residuals
+
+    def ssr_f_test(self, y, x, lag, rows=None):
+        """
+        p-value of the `ssr_ftest` of grangercausalitytests (does x Granger cause y) at a single lag, only on the records whose lags are known
+
+        Args:
+            y (ndarray) : response series
+            x (ndarray) : predictor series
+            lag (int) : lag of the test
+            rows (ndarray | None) : positions t of the records where x and y are known from t - lag to t (see `MissingnessIndex.get_lagged_rows()`), computed if not provided
+        """
+        return self.granger_test(y, x, lag, rows, "ssr_ftest")
+
+    def granger_test(self, y, x, lag, rows=None, test="ssr_ftest"):
+        """
+        p-value of a test of grangercausalitytests (does x Granger cause y) at a single lag, only on the records whose lags are known
+
+        Args:
+            y (ndarray) : response series
+            x (ndarray) : predictor series
+            lag (int) : lag of the test
+            rows (ndarray | None) : positions t of the records where x and y are known from t - lag to t (see `MissingnessIndex.get_lagged_rows()`), computed if not provided
+            test (str) : `ssr_ftest`, `params_ftest` (equal for least squares), `ssr_chi2test` or `lrtest`
+
+        Returns:
+            the p-value, np.nan if there is not enough records
+        """
+        if rows is None:
+            rows = MissingnessIndex(np.column_stack([y, x])).get_lagged_rows(
+                [0, 1], lag
+            )
+        degrees_of_freedom = len(rows) - 2 * lag - 1
+        if degrees_of_freedom <= 0:
+            return np.nan
+        target, z = self.lagged_design(y, x, lag, rows)
+        restricted_ssr = np.linalg.lstsq(z[:, : lag + 1], target, rcond=None)[1]
+        unrestricted_ssr = np.linalg.lstsq(z, target, rcond=None)[1]
+        if len(restricted_ssr) == 0 or len(unrestricted_ssr) == 0:
+            return np.nan
+        restricted_ssr, unrestricted_ssr = restricted_ssr[0], unrestricted_ssr[0]
+        if test == "ssr_chi2test":
+            return chi2.sf(
+                len(rows) * (restricted_ssr - unrestricted_ssr) / unrestricted_ssr, lag
+            )
+        if test == "lrtest":
+            return chi2.sf(len(rows) * np.log(restricted_ssr / unrestricted_ssr), lag)
+        f_statistic = (
+            (restricted_ssr - unrestricted_ssr)
+            / lag
+            / (unrestricted_ssr / degrees_of_freedom)
+        )
+        return f_distribution.sf(f_statistic, lag, degrees_of_freedom)
+
+    def lagged_design(self, y, x, lag, rows):
+        """
+        Build y[t] and the regressors [1, y[t - 1], ..., y[t - lag], x[t - 1], ..., x[t - lag]] for the positions t in rows (x lags are omitted if x is None), only the used records are gathered
+        """
+        lagged_rows = rows[:, None] - np.arange(1, lag + 1)
+        columns = [np.ones((len(rows), 1)), y[lagged_rows]]
+        if x is not None:
+            columns.append(x[lagged_rows])
+        return y[rows], np.hstack(columns)
+
+    def var_lag_order(self, dataframe, criterion="aic", run_lengths=None, n_diff=0):
         """
         Pass in a dataframe
-        Returns the optimal lag order given the criterion input for a VAR model
+        Returns the optimal lag order given the criterion input for a VAR model with constant, selected as the `select_order` of statsmodels (same maximum order and same common sample for every order) by least squares, only on the records whose lags are known
 
         Args:
-            dataframe (DataFrame) : pandas dataframe
+            dataframe (DataFrame | ndarray) : pandas dataframe (or array of shape (n_records, n_columns)), can contain np.nan
             criterion (str) : criterion, `aic` by default
+            run_lengths (ndarray | None) : run lengths of the known records of all the columns before differentiation (see `MissingnessIndex.get_run_lengths()`), computed if not provided
+            n_diff (int) : number of differentiations of the columns
         """
-        # TODO: assert n_columns = 2
         # TODO: assert dataframe stationary
-        model = VAR(dataframe)
-        select_order = model.select_order()
-        if criterion == "aic":
-            # We select the order based on AIC criterion
-            optimal_lag = select_order.aic
+        if isinstance(dataframe, pd.DataFrame):
+            values = dataframe.to_numpy(dtype=float, na_value=np.nan)
         else:
-            # TODO: having other criterions handled
-            optimal_lag = select_order.aic
-        return optimal_lag
+            values = np.asarray(dataframe, dtype=float)
+        if run_lengths is None:
+            missingness = MissingnessIndex(values)
+            run_lengths = missingness.get_run_lengths(missingness.get_columns())
+        n_columns = values.shape[1]
+
+        n_records = np.count_nonzero(run_lengths > n_diff)
+        max_lag = min(
+            int(round(12 * (n_records / 100.0) ** (1 / 4.0))),
+            (n_records - n_columns - 1) // (n_columns + 1),
+        )
+        if max_lag < 1:
+            return 0
+        rows = np.flatnonzero(run_lengths > max_lag + n_diff)
+        targets = values[rows]
+        criteria = []
+        for lag in range(max_lag + 1):
+            # TODO: having other criterions handled, the AIC is used
+            z = np.hstack(
+                [np.ones((len(rows), 1))]
+                + [values[rows - k] for k in range(1, lag + 1)]
+            )
+            residuals = targets - z @ np.linalg.lstsq(z, targets, rcond=None)[0]
+            _, log_determinant = np.linalg.slogdet(residuals.T @ residuals / len(rows))
+            criteria.append(log_determinant + 2.0 / len(rows) * lag * n_columns**2)
+        return int(np.argmin(criteria))
 
     def gfsm_features(self, matrix, labels, target):
         """
@@ -142,9 +716,216 @@ class GrangerCausality(TemplateMethod):
             labels
             target (str) : target name
         """
-        features = []
-        for label in set(labels):
-            ind = np.where(labels == label)
-            max_feature = matrix[target].iloc[ind].idxmax()
-            features.append(max_feature)
-        return features
+        return self.gfsm_targets_features(matrix, labels, [target])[target]
+
+    def gfsm_targets_features(self, matrix, labels, targets):
+        """
+        Returns, for all the targets at once, the features in matrix having the max causality with the target for each cluster.
+        The features are sorted by cluster once, the maximum of every (cluster, target) is a single reduceat on the sorted block, and the first feature reaching it is taken (like `idxmax`)
+
+        Args:
+            matrix (DataFrame) : the granger Matrix
+            labels (ndarray) : cluster of each feature of the matrix
+            targets (str[]) : target names
+        """
+        labels = np.asarray(labels)
+        order = np.argsort(labels, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(labels[order]) != 0])
+        counts = np.diff(np.r_[starts, len(order)])
+
+        values = np.nan_to_num(
+            matrix[targets].to_numpy(dtype=float)[order], nan=-np.inf
+        )
+        maximums = np.maximum.reduceat(values, starts, axis=0)
+        is_maximum = values == np.repeat(maximums, counts, axis=0)
+        sorted_positions = np.where(
+            is_maximum, np.arange(len(order))[:, None], len(order)
+        )
+        best = order[np.minimum.reduceat(sorted_positions, starts, axis=0)]
+
+        return {
+            target: list(matrix.index[best[:, j]]) for j, target in enumerate(targets)
+        }
+
+    def start_online(
+        self, dataframe, target_columns, lag=2, forgetting_factor=0.99, alpha=0.05
+    ):
+        """
+        Start following the Granger causality of every feature on the targets online. The history is differenced like in `select()` and used to initialize the recursive least squares.
+        The significance of every pair at the end of the history is the reference used by the drift signal.
+
+        Args:
+            dataframe (DataFrame) : history, 1 column by feature and 1 line by entry
+            target_columns (str[]) : array of the target column names
+            lag (int) : lag order of the tested models
+            forgetting_factor (float) : weight of the past records (between 0 and 1), the memory is about 1 / (1 - forgetting_factor) records
+            alpha (float) : significance level of the tests
+        """
+        _, n_diff = stationary_dataframe(dataframe)
+        columns = list(dataframe.columns)
+        n_columns = len(columns)
+        target_positions = [columns.index(target) for target in target_columns]
+        # (feature position, target position, target number) of every tested pair
+        pairs = np.array(
+            [
+                (feature, target, j)
+                for j, target in enumerate(target_positions)
+                for feature in range(n_columns)
+                if feature != target
+            ]
+        )
+        n_pairs = len(pairs)
+
+        def initial_model(dimension):
+            return {
+                "theta": np.zeros((n_pairs, dimension)),
+                "P": np.repeat(np.eye(dimension)[None] * 1e6, n_pairs, axis=0),
+                "ssr": np.zeros(n_pairs),
+            }
+
+        self._online = {
+            "columns": columns,
+            "target_columns": list(target_columns),
+            "pairs": pairs,
+            "lag": lag,
+            "n_diff": n_diff,
+            "forgetting_factor": forgetting_factor,
+            "alpha": alpha,
+            "raw_tail": np.empty((0, n_columns)),
+            "lags": np.full((lag, n_columns), np.nan),
+            "n_effective": np.zeros(n_pairs),
+            "restricted": initial_model(lag + 1),
+            "unrestricted": initial_model(2 * lag + 1),
+            "reference": None,
+        }
+        for record in dataframe.to_numpy(dtype=float, na_value=np.nan):
+            self.update_online(record)
+        self._online["reference"] = self.get_online_p_values().to_numpy() < alpha
+
+    def update_online(self, record):
+        """
+        Update the online causality with a new record, in O(lag²) for each (feature, target) pair. Pairs with missing values in the record or its lags are not updated.
+
+        Args:
+            record (Series | dict | ndarray) : new record, with a value for each column given to `start_online()`
+        """
+        online = self._online
+        if isinstance(record, (pd.Series, dict)):
+            record = pd.Series(record)[online["columns"]]
+        record = np.asarray(record, dtype=float)
+
+        # difference the record as many times as the history
+        if len(online["raw_tail"]) < online["n_diff"]:
+            online["raw_tail"] = np.vstack([online["raw_tail"], record])
+            return
+        value = np.diff(
+            np.vstack([online["raw_tail"], record]), n=online["n_diff"], axis=0
+        )[0]
+        if online["n_diff"]:
+            online["raw_tail"] = np.vstack([online["raw_tail"][1:], record])
+
+        features, targets = online["pairs"][:, 0], online["pairs"][:, 1]
+        # lagged values, most recent first, of shape (lag, n_columns)
+        lags = online["lags"]
+        ones = np.ones((len(targets), 1))
+        z_restricted = np.hstack([ones, lags[:, targets].T])
+        z_unrestricted = np.hstack([z_restricted, lags[:, features].T])
+        y = value[targets]
+        valid = ~np.isnan(z_unrestricted).any(axis=1) & ~np.isnan(y)
+
+        if valid.any():
+            weight = online["forgetting_factor"]
+            for model, z in [
+                (online["restricted"], z_restricted),
+                (online["unrestricted"], z_unrestricted),
+            ]:
+                self._rls_update(model, z[valid], y[valid], valid, weight)
+            online["n_effective"][valid] = weight * online["n_effective"][valid] + 1
+
+        online["lags"] = np.vstack([value, lags[:-1]])
+
+    def _rls_update(self, model, z, y, mask, weight):
+        """
+        Private method. Recursive least squares update (with forgetting factor) of the models selected by mask, vectorized on the models
+
+        Args:
+            model (dict) : `theta`, `P` and weighted sum of squared residuals `ssr` of the models
+            z (ndarray) : regressors of shape (n_updated_models, dimension)
+            y (ndarray) : observed values of shape (n_updated_models,)
+            mask (ndarray) : boolean mask of the updated models
+            weight (float) : forgetting factor
+        """
+        theta, P = model["theta"][mask], model["P"][mask]
+        Pz = np.einsum("mij,mj->mi", P, z)
+        denominator = weight + np.einsum("mi,mi->m", z, Pz)
+        gain = Pz / denominator[:, None]
+        error = y - np.einsum("mi,mi->m", z, theta)
+
+        model["theta"][mask] = theta + gain * error[:, None]
+        model["P"][mask] = (P - np.einsum("mi,mj->mij", gain, Pz)) / weight
+        model["ssr"][mask] = (
+            weight * model["ssr"][mask] + error**2 * weight / denominator
+        )
+
+    def get_online_f_tests(self):
+        """
+        Get the current F statistics and p-values (like the `ssr_ftest` of `select()`) of the online causality. Rows are the features, columns are the targets.
+        """
+        online = self._online
+        lag = online["lag"]
+        degrees_of_freedom = online["n_effective"] - 2 * lag - 1
+        restricted_ssr = online["restricted"]["ssr"]
+        unrestricted_ssr = online["unrestricted"]["ssr"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f_statistics = np.maximum(
+                (restricted_ssr - unrestricted_ssr)
+                / lag
+                / (unrestricted_ssr / degrees_of_freedom),
+                0,
+            )
+            p_values = f_distribution.sf(f_statistics, lag, degrees_of_freedom)
+        p_values[degrees_of_freedom <= 0] = np.nan
+
+        def to_dataframe(values):
+            matrix = np.full(
+                (len(online["columns"]), len(online["target_columns"])), np.nan
+            )
+            matrix[online["pairs"][:, 0], online["pairs"][:, 2]] = values
+            return pd.DataFrame(
+                matrix, index=online["columns"], columns=online["target_columns"]
+            )
+
+        return to_dataframe(f_statistics), to_dataframe(p_values)
+
+    def get_online_p_values(self):
+        """
+        Get the current p-values of the online causality. Rows are the features, columns are the targets.
+        """
+        return self.get_online_f_tests()[1]
+
+    def get_drift(self):
+        """
+        Drift signal of the online causality: share of the (feature, target) pairs whose significance changed since the reference (end of the history given to `start_online()`, or last `reset_drift_reference()`)
+        """
+        p_values = self.get_online_p_values().to_numpy()
+        significant = p_values < self._online["alpha"]
+        known = ~np.isnan(p_values)
+        changed = (significant != self._online["reference"]) & known
+        return changed.sum() / max(known.sum(), 1)
+
+    def needs_reselection(self, threshold=0.1):
+        """
+        Tell if the causal structure changed enough to justify a full offline `select()`
+
+        Args:
+            threshold (float) : maximum share of pairs whose significance can change
+        """
+        return self.get_drift() > threshold
+
+    def reset_drift_reference(self):
+        """
+        Use the current significance of the pairs as the reference of the drift signal (ie after an offline `select()`)
+        """
+        self._online["reference"] = (
+            self.get_online_p_values().to_numpy() < self._online["alpha"]
+        )
@@ -0,0 +1,76 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      MRMR.py                                            ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:12:28 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+from src.scripts.utils import nan_correlation
+
+import numpy as np
+import pandas as pd
+
+
+class MRMR(TemplateMethod):
+    """
+    MRMR is a class which implements the TemplateMethods in order to implement the max-relevance min-redundancy feature selection.
+    Features are picked one by one, maximizing their absolute correlation with the target minus their mean absolute correlation with the already picked features, so that neighbouring sensors measuring the same thing are not all selected.
+    The redundancy is updated incrementally: each step only correlates the newly picked feature with the candidates, selecting k features among N costs O(k.N.records) instead of the full N x N matrix.
+    The `_score` contains the relevance (absolute correlation with the target) of every feature.
+    """
+
+    def __init__(self):
+        TemplateMethod.__init__(self, "MRMR")
+
+    def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        X = dataframe.to_numpy(dtype=float, na_value=np.nan)
+        relevances = np.abs(
+            nan_correlation(X, dataframe[target_columns].to_numpy(dtype=float))
+        )
+        self._score = pd.DataFrame(
+            relevances, index=dataframe.columns, columns=target_columns
+        )
+
+        self._selected_features = dict()
+        for j, target_column in enumerate(target_columns):
+            relevance = np.nan_to_num(relevances[:, j], nan=-np.inf)
+            # a target is not a feature of itself
+            relevance[dataframe.columns.get_indexer_for([target_column])] = -np.inf
+            selected = self.mrmr(X, relevance, number_of_target_to_keep)
+            self._selected_features[target_column] = list(dataframe.columns[selected])
+
+    def mrmr(self, X, relevance, number_of_features):
+        """
+        Greedy max-relevance min-redundancy selection with an incremental redundancy term
+
+        Args:
+            X (ndarray) : features array of shape (n_records, n_features), can contain np.nan
+            relevance (ndarray) : relevance of each feature, -np.inf for the features which cannot be selected
+            number_of_features (int) : number of features to select
+
+        Returns:
+            list of the positions of the selected features, in the selection order
+        """
+        candidates = np.isfinite(relevance)
+        redundancy = np.zeros(len(relevance))
+        selected = []
+        while len(selected) < number_of_features and candidates.any():
+            score = relevance - (redundancy / len(selected) if selected else 0)
+            best = int(np.argmax(np.where(candidates, score, -np.inf)))
+            selected.append(best)
+            candidates[best] = False
+
+            # only the correlations between the new feature and the remaining candidates are computed
+            remaining = np.flatnonzero(candidates)
+            redundancy[remaining] += np.nan_to_num(
+                np.abs(nan_correlation(X[:, remaining], X[:, [best]])[:, 0])
+            )
+        return selected
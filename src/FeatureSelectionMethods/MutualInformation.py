@@ -0,0 +1,139 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      MutualInformation.py                               ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:26:37 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+
+import numpy as np
+import pandas as pd
+
+
+class MutualInformation(TemplateMethod):
+    """
+    MutualInformation is a class which implements the TemplateMethods in order to implement a mutual information feature selection, able to catch nonlinear dependences.
+    Each feature is discretized once into quantile bins, then the mutual information with every target is estimated from joint histograms counted for all the features at once.
+    The Miller-Madow bias correction makes the scores comparable between features with different amounts of missing data. The score is the information coefficient of correlation sqrt(1 - exp(-2 * MI)), between 0 and 1 (equal to the absolute correlation for gaussian data).
+
+    Args:
+        n_bins (int) : number of quantile bins used to discretize the features
+        max_lag (int) : maximum lag (in records) between a feature and a target, the best lag is kept. 0 to only compare simultaneous records
+
+    Attributes:
+        _n_bins (int) : number of quantile bins used to discretize the features
+        _max_lag (int) : maximum lag (in records) between a feature and a target
+        _best_lags (DataFrame) : Dataframe with the same shape as _score containing the lag where the best score is reached
+    """
+
+    _n_bins = None
+    _max_lag = None
+    _best_lags = None
+
+    def __init__(self, n_bins=8, max_lag=0):
+        TemplateMethod.__init__(self, "MutualInformation")
+        self._n_bins = n_bins
+        self._max_lag = max_lag
+
+    def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        codes = self.discretize(
+            dataframe.to_numpy(dtype=float, na_value=np.nan), self._n_bins
+        )
+        n_records = codes.shape[0]
+
+        information = np.full(
+            (dataframe.shape[1], len(target_columns), self._max_lag + 1), np.nan
+        )
+        for j, target_position in enumerate(
+            dataframe.columns.get_indexer_for(target_columns)
+        ):
+            for lag in range(min(self._max_lag, n_records - 1) + 1):
+                information[:, j, lag] = self.mutual_information(
+                    codes[: n_records - lag], codes[lag:, target_position]
+                )
+
+        best_lags = np.nan_to_num(information, nan=-1).argmax(axis=2)
+        information = np.take_along_axis(information, best_lags[..., None], 2)[..., 0]
+
+        self._score = pd.DataFrame(
+            np.sqrt(1 - np.exp(-2 * information)),
+            index=dataframe.columns,
+            columns=target_columns,
+        )
+        self._best_lags = pd.DataFrame(
+            best_lags, index=dataframe.columns, columns=target_columns
+        )
+
+        self._select_best_features(number_of_target_to_keep)
+
+    def discretize(self, X, n_bins):
+        """
+        Discretize each column of X into n_bins quantile bins
+
+        Args:
+            X (ndarray) : array of shape (n_records, n_features), can contain np.nan
+
+        Returns:
+            int array of shape (n_records, n_features) with the bin of each value, -1 for the missing values
+        """
+        with np.errstate(invalid="ignore"):
+            edges = np.nanquantile(X, np.linspace(0, 1, n_bins + 1)[1:-1], axis=0)
+        codes = np.empty(X.shape, dtype=np.int64)
+        for i in range(X.shape[1]):
+            codes[:, i] = np.searchsorted(edges[:, i], X[:, i], side="right")
+        codes[np.isnan(X)] = -1
+        return codes
+
+    def mutual_information(self, codes_x, code_y):
+        """
+        Estimate the bias corrected (Miller-Madow) mutual information between every feature and a target, on the records where both values are known
+
+        Args:
+            codes_x (ndarray) : discretized features of shape (n_records, n_features)
+            code_y (ndarray) : discretized target of shape (n_records,)
+
+        Returns:
+            array of shape (n_features,) containing the mutual information in nats, np.nan if there is not enough records
+        """
+        n_features = codes_x.shape[1]
+        n_bins = self._n_bins
+        valid = (codes_x >= 0) & (code_y >= 0)[:, None]
+
+        # one bincount on the combined (feature, bin x, bin y) codes gives all the joint histograms
+        combined = (np.arange(n_features) * n_bins + codes_x) * n_bins + code_y[:, None]
+        joint = np.bincount(
+            combined[valid], minlength=n_features * n_bins * n_bins
+        ).reshape(n_features, n_bins, n_bins)
+
+        n = joint.sum(axis=(1, 2))
+        count_x = joint.sum(axis=2)
+        count_y = joint.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = count_x[:, :, None] * count_y[:, None, :]
+            terms = np.where(
+                joint > 0, joint * np.log(joint * n[:, None, None] / expected), 0
+            )
+            information = terms.sum(axis=(1, 2)) / n
+            correction = (
+                (joint > 0).sum(axis=(1, 2))
+                - (count_x > 0).sum(axis=1)
+                - (count_y > 0).sum(axis=1)
+                + 1
+            ) / (2 * n)
+        information = np.maximum(information - correction, 0)
+        information[n < 2 * n_bins] = np.nan
+        return information
+
+    def get_best_lags(self):
+        """
+        Accessor to the _best_lags variable
+        """
+        return self._best_lags
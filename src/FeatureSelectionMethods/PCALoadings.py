@@ -0,0 +1,259 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      PCALoadings.py                                     ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:56:41 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+from src.SensorStore import SensorStore
+from src.PartitionedSensorStore import PartitionedSensorStore
+
+from sklearn.decomposition import IncrementalPCA
+from sklearn.utils.extmath import randomized_svd
+
+import numpy as np
+import pandas as pd
+
+
+class PCALoadings(TemplateMethod):
+    """
+    PCALoadings is a class which implements the TemplateMethods in order to implement a PCA loadings feature selection.
+    The features are standardized (missing values are replaced by the mean) and the principal components are computed with a randomized SVD, or with an incremental PCA fitted chunk by chunk when chunk_size is provided.
+    With chunk_size, the data (a DataFrame, a `SensorStore` or a `PartitionedSensorStore`) is read twice chunk by chunk: once for the mean and standard deviation of the features, once to standardize and fit each chunk, so that only a few chunks are in memory at once. A store given to `FeatureSelection.select` then reaches the method without being loaded (see `select_store`).
+    The importance of a feature is the sum of its absolute loadings weighted by the explained variance ratio of each component, scaled so that the most important feature has an importance of 1. PCA is unsupervised, the importances are the same for every target.
+
+    Args:
+        n_components (int) : number of principal components used
+        chunk_size (int | None) : if provided, number of records by chunk for an incremental PCA (at least n_components), otherwise a randomized SVD is done on all the records
+        random_state (int) : seed of the randomized SVD
+
+    Attributes:
+        _n_components (int) : number of principal components used
+        _chunk_size (int | None) : number of records by chunk for an incremental PCA
+        _random_state (int) : seed of the randomized SVD
+        _explained_variance_ratio (ndarray) : explained variance ratio of the components of the last selection
+    """
+
+    _n_components = None
+    _chunk_size = None
+    _random_state = None
+    _explained_variance_ratio = None
+
+    def __init__(self, n_components=10, chunk_size=None, random_state=0):
+        TemplateMethod.__init__(self, "PCALoadings")
+        if chunk_size is not None and chunk_size < n_components:
+            raise ValueError(
+                f"chunk_size must be at least n_components ({n_components})"
+            )
+        self._n_components = n_components
+        self._chunk_size = chunk_size
+        self._random_state = random_state
+
+    def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        if isinstance(dataframe, (SensorStore, PartitionedSensorStore)):
+            columns = list(dataframe.get_columns())
+        else:
+            columns = list(dataframe.columns)
+        self._select_columns(
+            dataframe, columns, target_columns, number_of_target_to_keep
+        )
+
+    def supports_store(self):
+        return bool(self._chunk_size)
+
+    def select_store(
+        self, store, target_columns, number_of_target_to_keep=1, columns=None
+    ):
+        if not self._chunk_size:
+            TemplateMethod.select_store(
+                self, store, target_columns, number_of_target_to_keep, columns
+            )
+            return
+        if columns is None:
+            columns = list(store.get_columns())
+        self._select_columns(store, columns, target_columns, number_of_target_to_keep)
+
+    def _select_columns(self, data, columns, target_columns, number_of_target_to_keep):
+        """
+        Private method. Apply the PCA loadings selection to some columns of a DataFrame or a store
+
+        Args:
+            data (DataFrame | SensorStore | PartitionedSensorStore) : data of shape (n_records, n_features)
+            columns (str[]) : columns of data used as features
+            target_columns (str[]) : array of the target column names used to apply the feature selection
+            number_of_target_to_keep (int) : number of features to keep by target
+        """
+        if self._chunk_size:
+            components, self._explained_variance_ratio = self.incremental_components(
+                data, len(columns), columns
+            )
+        else:
+            blocks = list(self.iter_blocks(data, columns=columns))
+            X = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+            X = self.standardize(X, np.nanmean(X, axis=0), np.nanstd(X, axis=0))
+            n_components = min(self._n_components, *X.shape)
+            components, self._explained_variance_ratio = self.principal_components(
+                X, n_components
+            )
+        importances = self._explained_variance_ratio @ np.abs(components)
+        importances = importances / importances.max()
+
+        self._score = pd.DataFrame(
+            np.repeat(importances[:, None], len(target_columns), axis=1),
+            index=columns,
+            columns=target_columns,
+        )
+
+        self._select_best_features(number_of_target_to_keep)
+
+    def iter_blocks(self, data, block_size=None, columns=None):
+        """
+        Read the records of a DataFrame or a store block by block
+
+        Args:
+            data (DataFrame | SensorStore | PartitionedSensorStore) : data of shape (n_records, n_features)
+            block_size (int | None) : maximum number of records by block, if None, a single block by DataFrame or store (partition)
+            columns (str[] | None) : columns to read, if None, all the columns are read
+
+        Returns:
+            generator of float arrays of shape (n_block_records, n_features), can contain np.nan
+        """
+        if isinstance(data, PartitionedSensorStore):
+            for name in data.get_partitions()["name"]:
+                yield from self.iter_blocks(
+                    data.open_partition(name), block_size, columns
+                )
+            return
+
+        if isinstance(data, SensorStore):
+            n_records = len(data.get_index())
+            values = data.get_values()
+            positions = (
+                slice(None)
+                if columns is None
+                else data.get_columns().get_indexer_for(columns)
+            )
+        else:
+            n_records = len(data)
+            if columns is not None:
+                data = data[columns]
+        block_size = block_size or max(n_records, 1)
+        for start in range(0, n_records, block_size):
+            if isinstance(data, SensorStore):
+                # the store is column major, only this range of each column is read
+                yield np.asarray(
+                    values[positions, start : start + block_size], dtype=float
+                ).T
+            else:
+                yield data.iloc[start : start + block_size].to_numpy(
+                    dtype=float, na_value=np.nan
+                )
+
+    def streaming_moments(self, data, columns=None):
+        """
+        Compute the mean and the standard deviation of each feature in one pass over the blocks of the data, merging the moments of each block (Chan et al.)
+
+        Args:
+            data (DataFrame | SensorStore | PartitionedSensorStore) : data of shape (n_records, n_features)
+            columns (str[] | None) : columns used as features, if None, all the columns are used
+
+        Returns:
+            mean and standard deviation of each feature (np.nan without known value), and the number of records
+        """
+        count = mean = m2 = None
+        n_records = 0
+        for block in self.iter_blocks(data, self._chunk_size, columns):
+            if count is None:
+                count, mean, m2 = (np.zeros(block.shape[1]) for _ in range(3))
+            n_records += block.shape[0]
+            block_count = (~np.isnan(block)).sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                block_mean = np.nansum(block, axis=0) / block_count
+                block_m2 = np.nansum((block - block_mean) ** 2, axis=0)
+                total = count + block_count
+                delta = block_mean - mean
+                known = block_count > 0
+                mean = np.where(known, mean + delta * block_count / total, mean)
+                m2 = np.where(
+                    known, m2 + block_m2 + delta**2 * count * block_count / total, m2
+                )
+            count = total
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (
+                np.where(count > 0, mean, np.nan),
+                np.sqrt(m2 / count),
+                n_records,
+            )
+
+    def standardize(self, X, mean, std):
+        """
+        Standardize the features of X, the missing values and the constant features are replaced by 0
+
+        Args:
+            X (ndarray) : array of shape (n_records, n_features), can contain np.nan
+            mean (ndarray) : mean of each feature
+            std (ndarray) : standard deviation of each feature
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            X = (X - mean) / std
+        X[~np.isfinite(X)] = 0
+        return X
+
+    def incremental_components(self, data, n_features, columns=None):
+        """
+        Compute the principal components with an incremental PCA, each chunk is standardized just before being fitted.
+        Blocks shorter than chunk_size (end of a partition, end of the data) are carried over into the next fit, the last one is fitted with the previous chunk, so that no record is dropped
+
+        Args:
+            data (DataFrame | SensorStore | PartitionedSensorStore) : data of shape (n_records, n_features)
+            n_features (int) : number of features
+            columns (str[] | None) : columns used as features, if None, all the columns are used
+
+        Returns:
+            components of shape (n_components, n_features) and their explained variance ratio
+        """
+        mean, std, n_records = self.streaming_moments(data, columns)
+        n_components = min(self._n_components, n_records, n_features)
+        pca = IncrementalPCA(n_components=n_components)
+
+        pending, buffer, buffered = None, [], 0
+        for block in self.iter_blocks(data, self._chunk_size, columns):
+            buffer.append(self.standardize(block, mean, std))
+            buffered += block.shape[0]
+            if buffered >= self._chunk_size:
+                if pending is not None:
+                    pca.partial_fit(pending)
+                pending = np.concatenate(buffer)
+                buffer, buffered = [], 0
+        pca.partial_fit(np.concatenate(([] if pending is None else [pending]) + buffer))
+        return pca.components_, pca.explained_variance_ratio_
+
+    def principal_components(self, X, n_components):
+        """
+        Compute the principal components of a centered array with a randomized SVD
+
+        Args:
+            X (ndarray) : centered array of shape (n_records, n_features)
+            n_components (int) : number of components
+
+        Returns:
+            components of shape (n_components, n_features) and their explained variance ratio
+        """
+        _, singular_values, components = randomized_svd(
+            X, n_components, random_state=self._random_state
+        )
+        return components, singular_values**2 / (X**2).sum()
+
+    def get_explained_variance_ratio(self):
+        """
+        Accessor to the _explained_variance_ratio variable
+        """
+        return self._explained_variance_ratio
@@ -8,29 +8,107 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/06/16 17:42:24 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/18 23:26:37 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+from src.TopKScores import TopKScores
+from src.scripts.utils import (
+    blockwise_matrix,
+    correlation_tile_size,
+    nan_correlation,
+)
+
+import numpy as np
+import pandas as pd
 
 
 class PearsonCorrelation(TemplateMethod):
     """
     PearsonCorrelation is a class which implements the TemplateMethods in order to implement the Pearson Correlation feature selection
+    With a memory_budget, the features x targets correlations are computed by tiles fitting in the budget. The tiles are written in a memory-mapped float32 matrix if score_path is provided, otherwise they are directly reduced into the number_of_target_to_keep best features of each target, kept as a compact `TopKScores`.
+
+    Args:
+        memory_budget (int | None) : if provided, memory (in bytes) used by a tile of the computation
+        score_path (str | None) : if provided with memory_budget, path of the npy file where the scores are memory-mapped
+
+    Attributes:
+        _memory_budget (int | None) : memory (in bytes) used by a tile of the computation
+        _score_path (str | None) : path of the npy file where the scores are memory-mapped
     """
 
-    def __init__(self):
+    _memory_budget = None
+    _score_path = None
+
+    def __init__(self, memory_budget=None, score_path=None):
         TemplateMethod.__init__(self, "PearsonCorrelation")
+        self._memory_budget = memory_budget
+        self._score_path = score_path
 
     def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        if self._memory_budget:
+            return self.select_blockwise(
+                dataframe, target_columns, number_of_target_to_keep
+            )
+
         target_correlation = dataframe.corr()[target_columns]
         self._score = abs(target_correlation)
 
+        self._select_best_features(number_of_target_to_keep)
+
+    def select_lagged(
+        self, lagged_features, target_columns, number_of_target_to_keep=1
+    ):
+        # the targets are scored against one lag block at a time, lags are never materialized
+        targets = lagged_features.get_values(target_columns)
+        scores = [
+            nan_correlation(values, targets)
+            for _, _, values in lagged_features.iter_lags()
+        ]
+        self._score = pd.DataFrame(
+            np.abs(np.concatenate(scores)),
+            index=lagged_features.get_columns(),
+            columns=target_columns,
+        )
+
+        self._select_best_features(number_of_target_to_keep)
+
+    def select_blockwise(self, dataframe, target_columns, number_of_target_to_keep=1):
+        """
+        Select method computing the correlations by tiles fitting in the memory budget
+
+        Args:
+            dataframe (DataFrame) : dataframe which contains the data used to apply the feature selection. 1 column by feature and 1 line by entry
+            target_columns (str[]) : array of the target column names used to apply the feature selection
+            number_of_target_to_keep (int) : number of features to keep
+        """
+        X = dataframe.to_numpy(dtype=float, na_value=np.nan)
+        Y = X[:, dataframe.columns.get_indexer_for(target_columns)]
+
+        def score_tile(rows, columns):
+            return np.abs(nan_correlation(X[:, rows], Y[:, columns]))
+
+        matrix, (top_values, top_positions) = blockwise_matrix(
+            score_tile,
+            (X.shape[1], Y.shape[1]),
+            correlation_tile_size(self._memory_budget, X.shape[0]),
+            path=self._score_path,
+            top_k=number_of_target_to_keep,
+        )
+
+        if matrix is not None:
+            self._score = pd.DataFrame(
+                matrix, index=dataframe.columns, columns=target_columns, copy=False
+            )
+        else:
+            self._score = TopKScores(
+                top_values, top_positions, dataframe.columns, target_columns
+            )
+
         self._selected_features = dict()
-        for target_column in target_columns:
+        for j, target_column in enumerate(target_columns):
+            known = ~np.isnan(top_values[:, j])
             self._selected_features[target_column] = list(
-                self._score.sort_values(by=target_column, ascending=False)[
-                    :number_of_target_to_keep
-                ].index
+                dataframe.columns[top_positions[known, j]]
             )
@@ -0,0 +1,241 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      StabilitySelection.py                              ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:42:31 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+from src.FeatureSelectionMethods.TemplateMethod import TemplateMethod
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from numpy.lib.stride_tricks import sliding_window_view
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# data shared by the resamples of a worker process, set by _init_worker
+_worker_data = None
+
+
+def _init_worker(method, shm_name, shape, dtype, index, columns, block_size):
+    """
+    Private function, attach a worker process to the shared memory copy of the data
+    """
+    global _worker_data
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_data = {
+        "method": method,
+        "shm": shm,
+        "values": values,
+        "blocks": sliding_window_view(np.arange(shape[0]), block_size),
+        "resample": np.empty_like(values),
+        "index": index,
+        "columns": columns,
+    }
+
+
+def _run_resample(starts, target_columns, number_of_target_to_keep):
+    """
+    Private function, run the method of the worker on the resample made of the blocks beginning at starts
+    """
+    return _select_resample(
+        _worker_data["method"],
+        _worker_data["values"],
+        _worker_data["blocks"][starts].ravel()[: len(_worker_data["values"])],
+        _worker_data["resample"],
+        _worker_data["index"],
+        _worker_data["columns"],
+        target_columns,
+        number_of_target_to_keep,
+    )
+
+
+def _select_resample(
+    method,
+    values,
+    indices,
+    resample,
+    index,
+    columns,
+    target_columns,
+    number_of_target_to_keep,
+):
+    """
+    Private function, gather the records of a resample into the reused resample buffer and run the method on it.
+    The resample keeps the original index, so that the methods working on time (ie a coarse frequency) see a regular series
+    """
+    np.take(values, indices, axis=0, out=resample)
+    method.select(
+        pd.DataFrame(resample, index=index, columns=columns, copy=False),
+        target_columns,
+        number_of_target_to_keep,
+    )
+    return method.get_selected_features()
+
+
+class StabilitySelection(TemplateMethod):
+    """
+    StabilitySelection is a class which implements the TemplateMethods in order to wrap any other method into a bootstrap stability selection.
+    The wrapped method is applied on many moving block bootstrap resamples of the time series (blocks of consecutive records keep the temporal dependence), in parallel processes reading a single shared memory copy of the data.
+    Only the block starts of each resample are sent to the workers, and each worker gathers its resamples into a single buffer reused for all of them (one copy of the data by worker, not by resample). A resample keeps the original index.
+    The `_score` is the frequency at which each feature is selected for each target, the selected features are the most frequently selected ones.
+
+    Args:
+        method (TemplateMethod) : the wrapped feature selection method
+        n_resamples (int) : number of bootstrap resamples
+        block_size (int) : number of consecutive records in each block
+        n_workers (int | None) : number of worker processes, if None, one by CPU. With 1, resamples are run in the current process
+        random_state (int | None) : seed of the resamples
+
+    Attributes:
+        _method (TemplateMethod) : the wrapped feature selection method
+        _n_resamples (int) : number of bootstrap resamples
+        _block_size (int) : number of consecutive records in each block
+        _n_workers (int | None) : number of worker processes
+        _random_state (int | None) : seed of the resamples
+
+    Example:
+    ```python
+    from src.FeatureSelectionMethods.StabilitySelection import StabilitySelection
+    from src.FeatureSelectionMethods.PearsonCorrelation import PearsonCorrelation
+
+    stability = StabilitySelection(PearsonCorrelation(), n_resamples=200, block_size=24)
+    stability.select(data, target_columns=['pm2_5_station_3'], number_of_target_to_keep=10)
+    stability.get_feature_importances()  # selection frequencies
+    ```
+    """
+
+    _method = None
+    _n_resamples = None
+    _block_size = None
+    _n_workers = None
+    _random_state = None
+
+    def __init__(
+        self, method, n_resamples=200, block_size=24, n_workers=None, random_state=None
+    ):
+        TemplateMethod.__init__(self, f"Stability{method.get_method_name()}")
+        self._method = method
+        self._n_resamples = n_resamples
+        self._block_size = block_size
+        self._n_workers = n_workers
+        self._random_state = random_state
+
+    def select(self, dataframe, target_columns, number_of_target_to_keep=1):
+        values = dataframe.to_numpy(dtype=float, na_value=np.nan)
+
+        counts = pd.DataFrame(0, index=dataframe.columns, columns=target_columns)
+        for selected_features in self._run_resamples(
+            values,
+            dataframe.index,
+            dataframe.columns,
+            target_columns,
+            number_of_target_to_keep,
+        ):
+            for target_column, features in selected_features.items():
+                counts.loc[features, target_column] += 1
+        self._score = counts / self._n_resamples
+
+        self._select_best_features(number_of_target_to_keep)
+
+    def block_bootstrap_starts(self, n_records):
+        """
+        Draw the first record of the blocks of each moving block bootstrap resample
+
+        Args:
+            n_records (int) : number of records of the data
+
+        Returns:
+            generator of int arrays of length ceil(n_records / block_size)
+        """
+        block_size = min(self._block_size, n_records)
+        n_blocks = int(np.ceil(n_records / block_size))
+        rng = np.random.default_rng(self._random_state)
+        for _ in range(self._n_resamples):
+            yield rng.integers(0, n_records - block_size + 1, size=n_blocks)
+
+    def block_bootstrap_indices(self, n_records):
+        """
+        Generate the record indices of each moving block bootstrap resample. The blocks are rows of a strided view over the record positions, only the indices of each resample are allocated.
+
+        Args:
+            n_records (int) : number of records of the data
+
+        Returns:
+            generator of int arrays of length n_records
+        """
+        blocks = sliding_window_view(
+            np.arange(n_records), min(self._block_size, n_records)
+        )
+        for starts in self.block_bootstrap_starts(n_records):
+            yield blocks[starts].ravel()[:n_records]
+
+    def _run_resamples(
+        self, values, index, columns, target_columns, number_of_target_to_keep
+    ):
+        """
+        Private method. Run the wrapped method on every resample, yields the selected features of each resample.
+        At most two resamples by worker are submitted at once, the others are drawn when a result is received
+        """
+        if self._n_workers == 1:
+            resample = np.empty_like(values)
+            for indices in self.block_bootstrap_indices(values.shape[0]):
+                yield _select_resample(
+                    self._method,
+                    values,
+                    indices,
+                    resample,
+                    index,
+                    columns,
+                    target_columns,
+                    number_of_target_to_keep,
+                )
+            return
+
+        n_workers = self._n_workers or os.cpu_count() or 1
+        block_size = min(self._block_size, values.shape[0])
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(
+                    self._method,
+                    shm.name,
+                    values.shape,
+                    values.dtype,
+                    index,
+                    columns,
+                    block_size,
+                ),
+            ) as executor:
+                futures = deque()
+                for starts in self.block_bootstrap_starts(values.shape[0]):
+                    if len(futures) >= 2 * n_workers:
+                        yield futures.popleft().result()
+                    futures.append(
+                        executor.submit(
+                            _run_resample,
+                            starts,
+                            target_columns,
+                            number_of_target_to_keep,
+                        )
+                    )
+                while futures:
+                    yield futures.popleft().result()
+        finally:
+            shm.close()
+            shm.unlink()
@@ -8,10 +8,14 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/06/16 17:39:34 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/18 23:56:41 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
+from src.TopKScores import TopKScores
+
+import numpy as np
+
 
 class TemplateMethod:
     """
@@ -21,7 +25,7 @@ class TemplateMethod:
         method_name (str) : the name of the implemented method, name used to find the right instance
 
     Attributes:
-        _score (DataFrame) : Dataframe which contains len(target_columns) columns and len(features) lines representing the score result of the feature selection
+        _score (DataFrame | TopKScores) : Dataframe which contains len(target_columns) columns and len(features) lines representing the score result of the feature selection, or its compact top-k representation
         _method_name (str) : variable which stores the method name
         _selected_features (dict(str[])) : Dictionnary with `target_columns` as keys. Each value corresponds to an Array of the selected features to keep according to the feature selection method for the key target_column.
     """
@@ -44,11 +48,81 @@ class TemplateMethod:
         """
         raise NotImplementedError
 
-    def get_feature_importances(self):
+    def select_lagged(
+        self, lagged_features, target_columns, number_of_target_to_keep=1
+    ):
+        """
+        Select method for lagged features (`LaggedFeatures`). By default, all the lagged features are materialized and given to `select`. Can be overided to consume the lags lazily.
+
+        Args:
+            lagged_features (LaggedFeatures) : the data extended with its shifted columns
+            target_columns (str[]) : array of the target column names used to apply the feature selection
+            number_of_target_to_keep (int | None) : number of target to keep to select features. If None, algorithm will try to find the best compromise
+        """
+        self.select(
+            lagged_features.to_dataframe(), target_columns, number_of_target_to_keep
+        )
+
+    def supports_store(self):
+        """
+        Indicate if `select_store` consumes a store without loading it. By default False, `FeatureSelection.select` then gives the loaded store to `select`
+        """
+        return False
+
+    def select_store(
+        self, store, target_columns, number_of_target_to_keep=1, columns=None
+    ):
+        """
+        Select method for the data of a store (`SensorStore` or `PartitionedSensorStore`). By default, the used columns of the store are loaded and given to `select`. Can be overided (with `supports_store`) to read the store chunk by chunk.
+
+        Args:
+            store (SensorStore | PartitionedSensorStore) : store which contains the data used to apply the feature selection
+            target_columns (str[]) : array of the target column names used to apply the feature selection
+            number_of_target_to_keep (int | None) : number of target to keep to select features. If None, algorithm will try to find the best compromise
+            columns (str[] | None) : columns of the store used as features (with the target_columns), if None, all the columns are used
+        """
+        self.select(
+            store.to_dataframe(columns), target_columns, number_of_target_to_keep
+        )
+
+    def _select_best_features(self, number_of_target_to_keep):
+        """
+        Private method. Set the selected features of every target to its number_of_target_to_keep highest scores of `_score` (np.nan being the lowest), with a single argpartition on the whole score block instead of a sort by target
+
+        Args:
+            number_of_target_to_keep (int) : number of features to keep by target
+        """
+        values = np.nan_to_num(
+            self._score.to_numpy(dtype=float, na_value=np.nan), nan=-np.inf
+        )
+        k = min(number_of_target_to_keep, values.shape[0])
+        if k < 1:
+            self._selected_features = {column: [] for column in self._score.columns}
+            return
+        positions = np.argpartition(-values, k - 1, axis=0)[:k]
+        order = np.argsort(
+            -np.take_along_axis(values, positions, axis=0), axis=0, kind="stable"
+        )
+        positions = np.take_along_axis(positions, order, axis=0)
+        self._selected_features = {
+            target_column: list(self._score.index[positions[:, j]])
+            for j, target_column in enumerate(self._score.columns)
+        }
+
+    def get_feature_importances(self, top_k=None):
         """
         Accessor to the _score variable
+
+        Args:
+            top_k (int | None) : if provided, the scores are given as a compact `TopKScores` keeping the top_k best features of each target, otherwise as a dense dataframe
         """
-        return self._score
+        if top_k is None:
+            if isinstance(self._score, TopKScores):
+                return self._score.to_dataframe()
+            return self._score
+        if isinstance(self._score, TopKScores):
+            return self._score.truncate(top_k)
+        return TopKScores.from_dataframe(self._score, top_k)
 
     def get_method_name(self):
         """
@@ -0,0 +1,159 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      LaggedFeatures.py                                  ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:09:00 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class LaggedFeatures:
+    """
+    LaggedFeatures represents a dataframe extended with shifted copies of its columns (named `{column}_h-{i}` for a shift of i records), without copying the data.
+    All the lags are strided views over a single base array, the lagged columns are only materialized when they are asked for.
+
+    Args:
+        dataframe (DataFrame) : dataframe to extend, 1 column by feature and 1 line by entry
+        nb_shifts (int) : number of shifts, ie: if nb_shifts = 2, columns are extended with a shift of 1 and a shift of 2
+
+    Attributes:
+        _base (ndarray) : float array of shape (nb_shifts + len(index), len(columns)), the data preceded by nb_shifts lines of np.nan
+        _windows (ndarray) : strided view of shape (nb_shifts + 1, len(columns), len(index)), _windows[i] holds the columns shifted by i records
+        _index (Index) : index of the dataframe
+        _base_columns (Index) : columns of the dataframe
+        _nb_shifts (int) : number of shifts
+
+    Example:
+    ```python
+    from src.LaggedFeatures import LaggedFeatures
+
+    # Extend the data with 24 hourly lags without copying it, and select features on it
+    lagged_data = LaggedFeatures(data, nb_shifts=24)
+    fs.select(lagged_data, target_columns=['pm2_5_station_3'], method_names=['PearsonCorrelation'])
+    ```
+    """
+
+    _base = None
+    _windows = None
+    _index = None
+    _base_columns = None
+    _nb_shifts = None
+
+    def __init__(self, dataframe, nb_shifts=1):
+        self._index = dataframe.index
+        self._base_columns = dataframe.columns
+        self._nb_shifts = nb_shifts
+
+        n_rows, n_columns = dataframe.shape
+        dtype = np.result_type(np.float32, *dataframe.dtypes)
+        self._base = np.empty((nb_shifts + n_rows, n_columns), dtype=dtype)
+        self._base[:nb_shifts] = np.nan
+        self._base[nb_shifts:] = dataframe.to_numpy(dtype=dtype, na_value=np.nan)
+
+        # the k-th window starts k lines after the beginning of base, reversed so that _windows[i] is the shift i
+        self._windows = sliding_window_view(self._base, n_rows, axis=0)[::-1]
+
+    def get_nb_shifts(self):
+        """
+        Accessor to the _nb_shifts variable
+        """
+        return self._nb_shifts
+
+    def get_index(self):
+        """
+        Accessor to the _index variable
+        """
+        return self._index
+
+    def get_base_columns(self):
+        """
+        Accessor to the _base_columns variable
+        """
+        return self._base_columns
+
+    def get_lag_columns(self, lag):
+        """
+        Get the column names for a shift
+
+        Args:
+            lag (int) : shift, 0 for the original columns
+        """
+        if lag == 0:
+            return self._base_columns
+        return self._base_columns + f"_h-{lag}"
+
+    def get_columns(self):
+        """
+        Get all the column names, in the same order as `libs.utils_data.shift_data`
+        """
+        return self._base_columns.append(
+            [self.get_lag_columns(lag) for lag in range(1, self._nb_shifts + 1)]
+        )
+
+    def get_lag_values(self, lag):
+        """
+        Get a read-only view of shape (len(index), len(columns)) of the columns shifted by lag records
+
+        Args:
+            lag (int) : shift, 0 for the original columns
+        """
+        if not 0 <= lag <= self._nb_shifts:
+            raise ValueError(f"lag must be between 0 and {self._nb_shifts}")
+        return self._windows[lag].T
+
+    def iter_lags(self):
+        """
+        Iterate over the shifts, yields (lag, column names, read-only view of the values)
+        """
+        for lag in range(self._nb_shifts + 1):
+            yield lag, self.get_lag_columns(lag), self.get_lag_values(lag)
+
+    def locate(self, column):
+        """
+        Get the shift and the position in the original columns of a column name
+
+        Args:
+            column (str) : column name, ie `no_station_3_h-2`
+        """
+        if column in self._base_columns:
+            return 0, self._base_columns.get_loc(column)
+        name, _, lag = column.rpartition("_h-")
+        if not lag.isdigit() or name not in self._base_columns:
+            raise KeyError(column)
+        return int(lag), self._base_columns.get_loc(name)
+
+    def get_values(self, columns):
+        """
+        Materialize some columns as an array of shape (len(index), len(columns))
+
+        Args:
+            columns (str[]) : column names
+        """
+        values = np.empty((len(self._index), len(columns)), dtype=self._base.dtype)
+        for i, column in enumerate(columns):
+            lag, position = self.locate(column)
+            values[:, i] = self.get_lag_values(lag)[:, position]
+        return values
+
+    def to_dataframe(self, columns=None):
+        """
+        Materialize the lagged features (or only some columns) as a DataFrame
+
+        Args:
+            columns (str[] | None) : column names, if None, all the columns are materialized
+        """
+        if columns is None:
+            columns = self.get_columns()
+        return pd.DataFrame(
+            self.get_values(columns), index=self._index, columns=list(columns)
+        )
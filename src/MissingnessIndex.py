@@ -0,0 +1,172 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      MissingnessIndex.py                                ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/19 00:06:26 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+import numpy as np
+import pandas as pd
+
+
+class MissingnessIndex:
+    """
+    MissingnessIndex is a compact bitmap of the known values of a dataframe (one bit by record and column), built once and shared by all the pairs of columns.
+    The records where several columns are jointly known, the contiguous segments of known records and the records usable with a given lag are derived with bitwise operations, and returned as index arrays so that the data does not need to be copied and dropped for each pair.
+
+    Args:
+        dataframe (DataFrame | ndarray) : data, 1 column by feature and 1 line by entry. With an array, columns are referenced by their position
+
+    Attributes:
+        _bits (ndarray) : uint8 array of shape (len(columns), ceil(n_rows / 8)), the packed bits of the known values of each column
+        _n_rows (int) : number of records
+        _columns (list) : names of the columns
+        _positions (dict(int)) : position of each column in the bitmap
+
+    Example:
+    ```python
+    from src.MissingnessIndex import MissingnessIndex
+
+    missingness = MissingnessIndex(data)
+    # records t where both sensors are known from t - 2 to t
+    rows = missingness.get_lagged_rows(['pm2_5_station_3', 'no_station_3'], lag=2)
+    ```
+    """
+
+    _bits = None
+    _n_rows = None
+    _columns = None
+    _positions = None
+
+    def __init__(self, dataframe):
+        if isinstance(dataframe, pd.DataFrame):
+            self._columns = list(dataframe.columns)
+            values = dataframe.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values = np.asarray(dataframe, dtype=float)
+            self._columns = list(range(values.shape[1]))
+        self._positions = {column: i for i, column in enumerate(self._columns)}
+        self._n_rows = values.shape[0]
+        self._bits = np.ascontiguousarray(np.packbits(~np.isnan(values), axis=0).T)
+
+    def _get_positions(self, columns):
+        """
+        Private method, get the positions of the columns in the bitmap
+        """
+        return [self._positions[column] for column in columns]
+
+    def _shift_bits(self, bits, shift):
+        """
+        Private method, shift packed bits by shift records towards the later records (bit t of the result is bit t - shift of bits), the first records are filled with 0
+        """
+        shifted = np.zeros_like(bits)
+        n_bytes, n_bits = divmod(shift, 8)
+        if n_bytes >= len(bits):
+            return shifted
+        shifted[n_bytes:] = bits[: len(bits) - n_bytes] >> n_bits
+        if n_bits:
+            shifted[n_bytes + 1 :] |= bits[: len(bits) - n_bytes - 1] << (8 - n_bits)
+        return shifted
+
+    def get_valid_bits(self, columns):
+        """
+        Get the packed bits of the records where all the columns are known
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+        """
+        return np.bitwise_and.reduce(self._bits[self._get_positions(columns)], axis=0)
+
+    def get_valid(self, columns):
+        """
+        Get the boolean mask of the records where all the columns are known
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+        """
+        return np.unpackbits(self.get_valid_bits(columns), count=self._n_rows).astype(
+            bool
+        )
+
+    def get_rows(self, columns):
+        """
+        Get the positions of the records where all the columns are known
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+        """
+        return np.flatnonzero(self.get_valid(columns))
+
+    def get_segments(self, columns, min_length=1):
+        """
+        Get the contiguous segments of records where all the columns are known
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+            min_length (int) : minimum number of records of a segment
+
+        Returns:
+            int array of shape (n_segments, 2) with the start (included) and the end (excluded) of each segment
+        """
+        valid = np.concatenate([[False], self.get_valid(columns), [False]])
+        changes = np.flatnonzero(valid[1:] != valid[:-1])
+        segments = changes.reshape(-1, 2)
+        return segments[segments[:, 1] - segments[:, 0] >= min_length]
+
+    def get_lagged_rows(self, columns, lag):
+        """
+        Get the positions t of the records where all the columns are known from t - lag to t, ie the records usable by a model of order lag
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+            lag (int) : number of previous records needed
+        """
+        # the bits are combined packed, with the bits shifted by 1, 2, 4... records, and unpacked once
+        window = self.get_valid_bits(columns)
+        covered = 1
+        while covered <= lag:
+            shift = min(covered, lag + 1 - covered)
+            window = window & self._shift_bits(window, shift)
+            covered += shift
+        return np.flatnonzero(np.unpackbits(window, count=self._n_rows))
+
+    def get_run_lengths(self, columns):
+        """
+        Get, for each record t, the number of consecutive records ending at t where all the columns are known (0 if a column is missing at t). The bits are unpacked once, then the records usable with any lag are `np.flatnonzero(run_lengths > lag)` and the longest segment ends at `np.argmax(run_lengths)`
+
+        Args:
+            columns (list) : columns (names, or positions if the index was built from an array)
+        """
+        valid = self.get_valid(columns)
+        positions = np.arange(self._n_rows)
+        last_missing = np.maximum.accumulate(np.where(valid, -1, positions))
+        return positions - last_missing
+
+    def get_position(self, column):
+        """
+        Get the position of a column in the bitmap (and in the values it was built from)
+
+        Args:
+            column (str | int) : column name, or position if the index was built from an array
+        """
+        return self._positions[column]
+
+    def get_columns(self):
+        """
+        Accessor to the _columns variable
+        """
+        return self._columns
+
+    def get_missing_ratio(self):
+        """
+        Get the ratio of missing records of each column
+        """
+        known = np.unpackbits(self._bits, axis=1, count=self._n_rows).sum(axis=1)
+        return pd.Series(1 - known / max(self._n_rows, 1), index=self._columns)
@@ -0,0 +1,160 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      PartitionedSensorStore.py                          ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:41:34 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+import json
+import os
+
+import pandas as pd
+
+from src.SensorStore import SensorStore
+
+
+class PartitionedSensorStore:
+    """
+    PartitionedSensorStore is a time-partitioned storage of a wide time x sensor matrix. Each partition (a month by default) is a `SensorStore` and an index keeps the time range of every partition.
+    A date-range query only opens the partitions overlapping the range and only reads the requested columns, so its cost depends on the range and not on the full history.
+
+    Args:
+        path (str) : path of the store directory (created with `PartitionedSensorStore.write()`)
+
+    Attributes:
+        _path (str) : path of the store directory
+        _columns (Index) : column names of the stored matrix
+        _freq (str) : pandas period frequency used to partition the records
+        _partitions (DataFrame) : index of the partitions, 1 line by partition with its `name`, `start`, `end` and `rows`
+
+    Example:
+    ```python
+    from src.PartitionedSensorStore import PartitionedSensorStore
+
+    # Partition the data by month, once
+    PartitionedSensorStore.write(data, './data/sample.partitioned')
+
+    # Run the selection on a pollution episode
+    store = PartitionedSensorStore('./data/sample.partitioned')
+    episode = store.to_dataframe(start='2020-01-10', end='2020-01-17 23:00')
+    fs.select(episode, target_columns=['pm2_5_station_3'], method_names=['PearsonCorrelation'])
+    ```
+    """
+
+    INDEX_FILE = "partitions.json"
+
+    _path = None
+    _columns = None
+    _freq = None
+    _partitions = None
+
+    def __init__(self, path):
+        self._path = path
+        with open(os.path.join(path, self.INDEX_FILE), "r") as file:
+            metadata = json.load(file)
+        self._columns = pd.Index(metadata["columns"])
+        self._freq = metadata["freq"]
+        self._partitions = pd.DataFrame(
+            metadata["partitions"], columns=["name", "start", "end", "rows"]
+        )
+        self._partitions["start"] = pd.to_datetime(self._partitions["start"])
+        self._partitions["end"] = pd.to_datetime(self._partitions["end"])
+
+    @classmethod
+    def write(cls, dataframe, path, freq="M", dtype="float32"):
+        """
+        Write a dataframe (1 column by sensor and 1 line by timestamp) as a time-partitioned store
+
+        Args:
+            dataframe (DataFrame) : dataframe to store, its index must be convertible to a DatetimeIndex
+            path (str) : path of the store directory, created if needed
+            freq (str) : pandas period frequency of the partitions (`M` for monthly partitions, `W` for weekly ones...)
+            dtype (str) : dtype of the stored values
+        """
+        index = pd.DatetimeIndex(dataframe.index)
+        dataframe = dataframe.set_axis(index, axis=0).sort_index(kind="stable")
+
+        partitions = []
+        for period, partition in dataframe.groupby(
+            dataframe.index.to_period(freq), sort=True
+        ):
+            name = str(period)
+            SensorStore.write(partition, os.path.join(path, name), dtype=dtype)
+            partitions.append(
+                {
+                    "name": name,
+                    "start": partition.index[0].isoformat(),
+                    "end": partition.index[-1].isoformat(),
+                    "rows": len(partition),
+                }
+            )
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, cls.INDEX_FILE), "w") as file:
+            json.dump(
+                {
+                    "columns": [str(column) for column in dataframe.columns],
+                    "freq": freq,
+                    "partitions": partitions,
+                },
+                file,
+            )
+        return cls(path)
+
+    def get_columns(self):
+        """
+        Accessor to the _columns variable
+        """
+        return self._columns
+
+    def get_partitions(self, start=None, end=None):
+        """
+        Get the index of the partitions overlapping the range between start and end (both included)
+
+        Args:
+            start (str | Timestamp | None) : first timestamp, if None, from the first record
+            end (str | Timestamp | None) : last timestamp, if None, until the last record
+        """
+        overlap = pd.Series(True, index=self._partitions.index)
+        if start is not None:
+            overlap &= self._partitions["end"] >= pd.Timestamp(start)
+        if end is not None:
+            overlap &= self._partitions["start"] <= pd.Timestamp(end)
+        return self._partitions[overlap]
+
+    def open_partition(self, name):
+        """
+        Open a partition as a `SensorStore`
+
+        Args:
+            name (str) : name of the partition (see `get_partitions()`)
+        """
+        return SensorStore(os.path.join(self._path, name))
+
+    def to_dataframe(self, columns=None, start=None, end=None):
+        """
+        Load the records between start and end (both included) as a DataFrame which can go straight into `FeatureSelection.select`. Only the overlapping partitions and the requested columns are read.
+
+        Args:
+            columns (str[] | None) : columns to load, if None, all the columns are loaded
+            start (str | Timestamp | None) : first timestamp, if None, from the first record
+            end (str | Timestamp | None) : last timestamp, if None, until the last record
+        """
+        if columns is None:
+            columns = self._columns
+        dataframes = [
+            self.open_partition(name).to_dataframe(columns, start, end)
+            for name in self.get_partitions(start, end)["name"]
+        ]
+        if not dataframes:
+            return pd.DataFrame(
+                columns=list(columns), index=pd.DatetimeIndex([]), dtype="float32"
+            )
+        return pd.concat(dataframes, axis=0)
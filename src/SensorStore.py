@@ -0,0 +1,192 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      SensorStore.py                                     ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:07:33 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class SensorStore:
+    """
+    SensorStore is a columnar binary storage of a wide time x sensor matrix. Each column is stored contiguously in a memory-mappable float32 array, next to a timestamp index and the column metadata.
+    Opening a store does not parse anything: pages are only read for the requested columns and are shared by all the processes opening the same store.
+
+    Args:
+        path (str) : path of the store directory (created with `SensorStore.write()` or `SensorStore.from_csv()`)
+
+    Attributes:
+        _path (str) : path of the store directory
+        _values (memmap) : memory-mapped array of shape (len(columns), len(index)), one line by column
+        _index (DatetimeIndex) : timestamp index of the records
+        _columns (Index) : column names of the stored matrix
+
+    Example:
+    ```python
+    from src.SensorStore import SensorStore
+
+    # Convert the csv once
+    SensorStore.from_csv('./data/sample.csv', './data/sample.store', index_col=0)
+
+    # Open it instantly in each session and give it directly to FeatureSelection
+    store = SensorStore('./data/sample.store')
+    fs.select(store, target_columns=['pm2_5_station_3'], method_names=['PearsonCorrelation'])
+    ```
+    """
+
+    VALUES_FILE = "values.npy"
+    INDEX_FILE = "index.npy"
+    METADATA_FILE = "metadata.json"
+
+    _path = None
+    _values = None
+    _index = None
+    _columns = None
+
+    def __init__(self, path):
+        self._path = path
+        with open(os.path.join(path, self.METADATA_FILE), "r") as file:
+            metadata = json.load(file)
+        self._values = np.load(os.path.join(path, self.VALUES_FILE), mmap_mode="r")
+        self._index = pd.DatetimeIndex(
+            np.load(os.path.join(path, self.INDEX_FILE)), name=metadata["index_name"]
+        )
+        self._columns = pd.Index(metadata["columns"])
+
+    @classmethod
+    def write(cls, dataframe, path, dtype="float32"):
+        """
+        Write a dataframe (1 column by sensor and 1 line by timestamp) as a store. Columns are written one at a time.
+
+        Args:
+            dataframe (DataFrame) : dataframe to store, its index must be convertible to a DatetimeIndex
+            path (str) : path of the store directory, created if needed
+            dtype (str) : dtype of the stored values
+        """
+        index = pd.DatetimeIndex(dataframe.index)
+        if not index.is_monotonic_increasing:
+            dataframe = dataframe.set_axis(index, axis=0).sort_index(kind="stable")
+            index = dataframe.index
+
+        os.makedirs(path, exist_ok=True)
+        values = np.lib.format.open_memmap(
+            os.path.join(path, cls.VALUES_FILE),
+            mode="w+",
+            dtype=dtype,
+            shape=(dataframe.shape[1], dataframe.shape[0]),
+        )
+        for i in range(dataframe.shape[1]):
+            values[i] = dataframe.iloc[:, i].to_numpy(dtype=dtype, na_value=np.nan)
+        values.flush()
+        del values
+
+        np.save(
+            os.path.join(path, cls.INDEX_FILE), index.to_numpy(dtype="datetime64[ns]")
+        )
+        with open(os.path.join(path, cls.METADATA_FILE), "w") as file:
+            json.dump(
+                {
+                    "columns": [str(column) for column in dataframe.columns],
+                    "index_name": index.name,
+                    "dtype": dtype,
+                },
+                file,
+            )
+        return cls(path)
+
+    @classmethod
+    def from_csv(cls, csv_path, path, dtype="float32", decimal=None, **read_csv_kwargs):
+        """
+        Convert a csv file (1 column by sensor and 1 line by timestamp) to a store
+
+        Args:
+            csv_path (str) : path of the csv file
+            path (str) : path of the store directory
+            dtype (str) : dtype of the stored values
+            decimal (str | None) : if provided, character replaced by `.` in the non numerical columns (ie `,` for french decimals)
+            **read_csv_kwargs : arguments given to `pd.read_csv` (ie `index_col=0`)
+        """
+        dataframe = pd.read_csv(csv_path, **read_csv_kwargs)
+        if decimal:
+            for column in dataframe.columns:
+                if not pd.api.types.is_numeric_dtype(dataframe[column]):
+                    dataframe[column] = pd.to_numeric(
+                        dataframe[column].str.replace(decimal, ".", regex=False),
+                        errors="coerce",
+                    )
+        return cls.write(dataframe, path, dtype=dtype)
+
+    def get_columns(self):
+        """
+        Accessor to the _columns variable
+        """
+        return self._columns
+
+    def get_index(self):
+        """
+        Accessor to the _index variable
+        """
+        return self._index
+
+    def get_rows(self, start=None, end=None):
+        """
+        Get the slice of the records between start and end (both included), found by binary search on the sorted index
+
+        Args:
+            start (str | Timestamp | None) : first timestamp, if None, from the first record
+            end (str | Timestamp | None) : last timestamp, if None, until the last record
+        """
+        return slice(
+            None if start is None else self._index.searchsorted(pd.Timestamp(start)),
+            (
+                None
+                if end is None
+                else self._index.searchsorted(pd.Timestamp(end), side="right")
+            ),
+        )
+
+    def get_values(self, columns=None, start=None, end=None):
+        """
+        Get the memory-mapped values of shape (len(columns), len(index)). Only the requested columns and records are read.
+
+        Args:
+            columns (str[] | None) : columns to get, if None, all the columns are returned without copy
+            start (str | Timestamp | None) : first timestamp, if None, from the first record
+            end (str | Timestamp | None) : last timestamp, if None, until the last record
+        """
+        rows = self.get_rows(start, end)
+        if columns is None:
+            return self._values[:, rows]
+        return self._values[self._columns.get_indexer_for(columns), rows]
+
+    def to_dataframe(self, columns=None, start=None, end=None):
+        """
+        Load the store (or only some columns and a date range) as a DataFrame which can go straight into `FeatureSelection.select`
+
+        Args:
+            columns (str[] | None) : columns to load, if None, all the columns are loaded
+            start (str | Timestamp | None) : first timestamp, if None, from the first record
+            end (str | Timestamp | None) : last timestamp, if None, until the last record
+        """
+        if columns is None:
+            columns = self._columns
+        missing = pd.Index(columns).difference(self._columns)
+        if len(missing):
+            raise KeyError(f"{list(missing)} not in the store {self._path}")
+        return pd.DataFrame(
+            np.asarray(self.get_values(columns, start, end)).T,
+            index=self._index[self.get_rows(start, end)],
+            columns=list(columns),
+        )
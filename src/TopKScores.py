@@ -0,0 +1,165 @@
+# ************************************************************************************************************************* #
+#   UTC Header                                                                                                              #
+#                                                         ::::::::::::::::::::       :::    ::: :::::::::::  ::::::::       #
+#      TopKScores.py                                      ::::::::::::::::::::       :+:    :+:     :+:     :+:    :+:      #
+#                                                         ::::::::::::::+++#####+++  +:+    +:+     +:+     +:+             #
+#      By: branlyst and ismailkad < >                     ::+++##############+++     +:+    +:+     +:+     +:+             #
+#                                                     +++##############+++::::       +#+    +:+     +#+     +#+             #
+#                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
+#                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
+#      Update: 2026/10/18 23:25:47 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#                                                                                                                           #
+# ************************************************************************************************************************* #
+
+import io
+
+import numpy as np
+import pandas as pd
+
+
+class TopKScores:
+    """
+    TopKScores is a compact representation of a features x targets score matrix, where only the k best features of each target are kept.
+    The scores are stored as two (k, n_targets) arrays (float32 scores and int32 feature positions) sorted by decreasing score, the dense features x targets dataframe is only built on request.
+
+    Args:
+        values (ndarray) : array of shape (k, len(targets)), scores of the k best features of each target, sorted by decreasing score (np.nan if the target has less than k scored features)
+        positions (ndarray) : array of shape (k, len(targets)), positions in features of the k best features of each target
+        features (Index | list) : names of all the scored features
+        targets (Index | list) : names of the targets
+
+    Attributes:
+        _values (ndarray) : float32 scores of the k best features of each target
+        _positions (ndarray) : int32 positions of the k best features of each target
+        _features (Index) : names of all the scored features
+        _targets (Index) : names of the targets
+
+    Example:
+    ```python
+    from src.TopKScores import TopKScores
+
+    scores = TopKScores.from_dataframe(fs.get_feature_importances()['PearsonCorrelation'], k=100)
+    scores.get_top('pm2_5_station_3')
+    payload = scores.to_bytes()  # cheap to send to another process
+    TopKScores.from_bytes(payload).to_dataframe()
+    ```
+    """
+
+    _values = None
+    _positions = None
+    _features = None
+    _targets = None
+
+    def __init__(self, values, positions, features, targets):
+        self._values = np.asarray(values, dtype=np.float32)
+        self._positions = np.asarray(positions, dtype=np.int32)
+        self._features = pd.Index(features)
+        self._targets = pd.Index(targets)
+
+    @classmethod
+    def from_dataframe(cls, score, k):
+        """
+        Keep the k best features of each target of a dense score dataframe, with a single argpartition on the whole score block
+
+        Args:
+            score (DataFrame) : dataframe of shape (features, targets)
+            k (int) : number of features kept by target
+        """
+        values = np.nan_to_num(
+            score.to_numpy(dtype=np.float32, na_value=np.nan), nan=-np.inf
+        )
+        k = min(k, values.shape[0])
+        positions = np.argpartition(-values, k - 1, axis=0)[:k]
+        top_values = np.take_along_axis(values, positions, axis=0)
+        order = np.argsort(-top_values, axis=0, kind="stable")
+        top_values = np.take_along_axis(top_values, order, axis=0)
+        top_values[np.isneginf(top_values)] = np.nan
+        return cls(
+            top_values,
+            np.take_along_axis(positions, order, axis=0),
+            score.index,
+            score.columns,
+        )
+
+    def to_dataframe(self):
+        """
+        Dense view of the scores, of shape (features, targets), np.nan for the features which are not kept for a target
+        """
+        dense = np.full((len(self._features), len(self._targets)), np.nan, np.float32)
+        known = ~np.isnan(self._values)
+        dense[self._positions[known], np.nonzero(known)[1]] = self._values[known]
+        return pd.DataFrame(dense, index=self._features, columns=self._targets)
+
+    def get_top(self, target, k=None):
+        """
+        Get the k best features of a target and their scores, sorted by decreasing score
+
+        Args:
+            target (str) : target name
+            k (int | None) : number of features, if None all the kept features
+        """
+        j = self._targets.get_loc(target)
+        values = self._values[:k, j]
+        known = ~np.isnan(values)
+        return pd.Series(
+            values[known],
+            index=self._features[self._positions[:k, j][known]],
+            name=target,
+        )
+
+    def get_selected_features(self, k=None):
+        """
+        Get the k best features of every target, in the format of `TemplateMethod.get_selected_features()`
+
+        Args:
+            k (int | None) : number of features by target, if None all the kept features
+        """
+        return {target: list(self.get_top(target, k).index) for target in self._targets}
+
+    def get_k(self):
+        """
+        Get the number of features kept by target
+        """
+        return self._values.shape[0]
+
+    def get_targets(self):
+        """
+        Accessor to the _targets variable
+        """
+        return self._targets
+
+    def truncate(self, k):
+        """
+        Get a TopKScores keeping only the k best features of each target
+        """
+        return TopKScores(
+            self._values[:k], self._positions[:k], self._features, self._targets
+        )
+
+    def to_bytes(self):
+        """
+        Serialize the scores as an uncompressed npz archive, the arrays are written as raw buffers
+        """
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            values=self._values,
+            positions=self._positions,
+            features=self._features.astype(str).to_numpy(dtype=str),
+            targets=self._targets.astype(str).to_numpy(dtype=str),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """
+        Deserialize scores serialized with `to_bytes()`
+        """
+        with np.load(io.BytesIO(payload)) as archive:
+            return cls(
+                archive["values"],
+                archive["positions"],
+                archive["features"],
+                archive["targets"],
+            )
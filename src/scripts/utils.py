@@ -8,13 +8,14 @@
 #                                                       +++##+++::::::::::::::       +#+    +:+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       +#+    +#+     +#+     +#+             #
 #                                                         ::::::::::::::::::::       #+#    #+#     #+#     #+#    #+#      #
-#      Update: 2022/06/08 15:23:32 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
+#      Update: 2026/10/19 00:05:31 by branlyst and ismai  ::::::::::::::::::::        ########      ###      ######## .fr   #
 #                                                                                                                           #
 # ************************************************************************************************************************* #
 
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
 
 
 def adf_test(series, title="", verbose=False):
@@ -45,6 +46,90 @@ def adf_test(series, title="", verbose=False):
         return False
 
 
+def batch_adf_test(dataframe):
+    """
+    Pass in a dataframe, returns the ADF report of every column (same values as `adf_test`, ie `adfuller(series.dropna(), autolag="AIC")`, within rounding)
+    Columns with the same missing values are tested together: the lagged differences of all of them are stacked, and one batched QR decomposition gives the residuals of every lag order of the AIC search
+    """
+    values = dataframe.to_numpy(dtype=float, na_value=np.nan)
+    known = ~np.isnan(values)
+    labels = ["ADF test statistic", "p-value", "# lags used", "# observations"]
+    report = pd.DataFrame(
+        np.nan,
+        index=dataframe.columns,
+        columns=labels + [f"critical value ({key})" for key in ["1%", "5%", "10%"]],
+    )
+
+    # columns sharing the same missing values have the same series length after dropna
+    _, groups = np.unique(np.packbits(known, axis=0).T, axis=0, return_inverse=True)
+    for group in np.unique(groups):
+        positions = np.flatnonzero(groups.ravel() == group)
+        x = values[known[:, positions[0]]][:, positions]
+        statistics, lags, nobs = _batch_adf_statistics(x)
+        report.iloc[positions, 0] = statistics
+        report.iloc[positions, 2] = lags
+        report.iloc[positions, 3] = nobs
+
+    report["p-value"] = [
+        mackinnonp(statistic, regression="c", N=1)
+        for statistic in report["ADF test statistic"]
+    ]
+    report.iloc[:, 4:] = [
+        mackinnoncrit(N=1, regression="c", nobs=nobs)
+        for nobs in report["# observations"]
+    ]
+    return report
+
+
+def _batch_adf_statistics(x):
+    """
+    Private function, pass in an array of shape (n_records, n_series) without missing values
+    returns the ADF statistics (constant, AIC lag search like `adfuller`), the used lags and the number of observations of every series
+    """
+    n_records, n_series = x.shape
+    if (x.max(axis=0) == x.min(axis=0)).any():
+        raise ValueError("Invalid input, x is constant")
+    maxlag = min(n_records // 2 - 2, int(np.ceil(12.0 * (n_records / 100.0) ** 0.25)))
+    if maxlag < 0:
+        raise ValueError(
+            "sample size is too short to use selected regression component"
+        )
+    xdiff = np.diff(x, axis=0)
+
+    def design(lag):
+        # (n_series, nobs, lag + 2) regressors [constant, level, differences lagged 1..lag] and (n_series, nobs) responses
+        nobs = n_records - 1 - lag
+        columns = [np.ones((nobs, n_series)), x[lag : n_records - 1]]
+        columns += [xdiff[lag - i : lag - i + nobs] for i in range(1, lag + 1)]
+        return np.stack(columns, axis=2).transpose(1, 0, 2), xdiff[lag:].T
+
+    # AIC search on the same observations for every lag: the residuals of the nested models come from a single QR
+    Z, y = design(maxlag)
+    nobs = Z.shape[1]
+    Q, R = np.linalg.qr(Z)
+    projections = np.einsum("snk,sn->sk", Q, y) ** 2
+    ssr = (y**2).sum(axis=1)[:, None] - np.cumsum(projections, axis=1)[:, 1:]
+    n_parameters = np.arange(2, maxlag + 3)
+    aic = nobs * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1) + 2 * n_parameters
+    best_lags = np.argmin(aic, axis=1)
+
+    # refit with the best lag on all the available observations, the level is moved to the last regressor so that its t-value comes from the last diagonal term of R
+    statistics = np.empty(n_series)
+    for lag in np.unique(best_lags):
+        series = best_lags == lag
+        Z, y = design(lag)
+        Z, y = Z[series][:, :, [0] + list(range(2, lag + 2)) + [1]], y[series]
+        Q, R = np.linalg.qr(Z)
+        projection = np.einsum("snk,sn->sk", Q, y)
+        residual_variance = ((y**2).sum(axis=1) - (projection**2).sum(axis=1)) / (
+            Z.shape[1] - Z.shape[2]
+        )
+        statistics[series] = (
+            np.sign(R[:, -1, -1]) * projection[:, -1] / np.sqrt(residual_variance)
+        )
+    return statistics, best_lags, n_records - 1 - best_lags
+
+
 def is_stationary(ts):
     """
     Check for stationarity of time series composing a dataframe or a series
@@ -54,10 +139,7 @@ def is_stationary(ts):
     if isinstance(ts, pd.Series):
         return adf_test(ts)
     elif isinstance(ts, pd.DataFrame):
-        for c in ts.columns:
-            if not adf_test(ts[c]):
-                return False
-        return True
+        return bool((batch_adf_test(ts)["p-value"] <= 0.05).all())
     else:
         print("Wrong input")
         return False
@@ -96,3 +178,164 @@ def symmetrize(df):
             A[j, i] = A[i, j]
 
     return A
+
+
+def symmetrize_blockwise(matrix, tile_size):
+    """
+    Same result as `symmetrize` (1 - max(A[i, j], A[j, i]) and 1 on the diagonal), computed in place by pairs of (tile_size, tile_size) tiles, so that a memory-mapped matrix is never fully loaded
+    """
+    n_row, n_col = matrix.shape
+    if n_row != n_col:
+        print("Please use a square matrix")
+        return 0
+
+    for row_start in range(0, n_row, tile_size):
+        rows = slice(row_start, min(row_start + tile_size, n_row))
+        for column_start in range(row_start, n_row, tile_size):
+            columns = slice(column_start, min(column_start + tile_size, n_row))
+            tile = 1 - np.maximum(matrix[rows, columns], matrix[columns, rows].T)
+            if row_start == column_start:
+                np.fill_diagonal(tile, 1)
+            matrix[rows, columns] = tile
+            matrix[columns, rows] = tile.T
+        if isinstance(matrix, np.memmap):
+            matrix.flush()
+
+    return matrix
+
+
+def nan_correlation(X, Y):
+    """
+    Pass in two arrays of shape (n_records, n_x) and (n_records, n_y) which can contain np.nan
+    returns the (n_x, n_y) Pearson correlation matrix, each pair being computed on the records where both values are known (like `DataFrame.corr()`)
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    valid_x = ~np.isnan(X)
+    valid_y = ~np.isnan(Y)
+    # centering on the global means does not change the result but avoids cancellations
+    X = np.where(valid_x, X - np.nanmean(X, axis=0), 0)
+    Y = np.where(valid_y, Y - np.nanmean(Y, axis=0), 0)
+    valid_x = valid_x.astype(float)
+    valid_y = valid_y.astype(float)
+
+    n = valid_x.T @ valid_y
+    sum_x = X.T @ valid_y
+    sum_y = valid_x.T @ Y
+    sum_xx = (X**2).T @ valid_y
+    sum_yy = valid_x.T @ (Y**2)
+    sum_xy = X.T @ Y
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = n * sum_xy - sum_x * sum_y
+        variance = (n * sum_xx - sum_x**2) * (n * sum_yy - sum_y**2)
+        correlation = covariance / np.sqrt(variance)
+    correlation[(n < 2) | ~(variance > 0)] = np.nan
+    return np.clip(correlation, -1, 1)
+
+
+def prune_columns(dataframe, max_missing_ratio=0.5, decimals=None, keep=None):
+    """
+    Pass in a dataframe, drops in a few array operations the columns which are useless for feature selection: empty columns, constant columns, columns with too many missing values and duplicated columns (found by hashing the columns, if decimals is provided, values are rounded before so that columns only differing by a rounding error are found too)
+    returns the pruned dataframe and a report dataframe indexed by the dropped columns, with the `reason` and the kept column a duplicate is equal to (`duplicate_of`)
+    """
+    keep = set(keep or [])
+    columns = dataframe.columns
+    values = dataframe.to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+    missing_ratio = missing.mean(axis=0)
+    with np.errstate(invalid="ignore"):
+        constant = np.nanmax(values, axis=0) == np.nanmin(values, axis=0)
+
+    reasons = np.full(len(columns), None, dtype=object)
+    reasons[missing_ratio > max_missing_ratio] = "missing"
+    reasons[constant] = "constant"
+    reasons[missing_ratio == 1] = "empty"
+
+    # position dependent combination of the hashes of the values, one hash by column
+    rounded = values if decimals is None else np.round(values, decimals)
+    hashes = pd.util.hash_array(rounded.ravel()).reshape(rounded.shape)
+    weights = pd.util.hash_array(np.arange(len(rounded)))
+    with np.errstate(over="ignore"):
+        column_hashes = (hashes * weights[:, None]).sum(axis=0)
+
+    duplicate_of = np.full(len(columns), None, dtype=object)
+    first_column = dict()
+    for i in np.flatnonzero(pd.isna(reasons)):
+        first = first_column.setdefault(column_hashes[i], i)
+        # the values are compared to rule out hash collisions
+        if first != i and np.array_equal(
+            rounded[:, i], rounded[:, first], equal_nan=True
+        ):
+            reasons[i] = "duplicate"
+            duplicate_of[i] = columns[first]
+
+    dropped = pd.notna(reasons) & ~columns.isin(keep)
+    report = pd.DataFrame(
+        {"reason": reasons[dropped], "duplicate_of": duplicate_of[dropped]},
+        index=columns[dropped],
+    )
+    return dataframe.loc[:, ~dropped], report
+
+
+def blockwise_matrix(score_tile, shape, tile_size, path=None, top_k=None):
+    """
+    Pass in a function computing a tile `score_tile(rows, columns)` (rows and columns being position arrays) of a matrix of the given shape, computes the matrix tile by tile so that only one tile is in memory at once
+    If path is provided, the tiles are written in a float32 npy file memory-mapped at path. If top_k is provided, the tiles are directly reduced into the top_k highest values of each column (np.nan being the lowest)
+    returns the matrix (memory-mapped if path is provided, None if only top_k is provided) and the top_k (values, positions) arrays of shape (top_k, n_columns) sorted by decreasing value (None if top_k is not provided)
+    """
+    n_rows, n_columns = shape
+    if path is not None:
+        matrix = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float32, shape=shape
+        )
+    elif top_k is None:
+        matrix = np.empty(shape, dtype=np.float32)
+    else:
+        matrix = None
+    if top_k is not None:
+        top_k = min(top_k, n_rows)
+        top_values = np.full((top_k, n_columns), -np.inf, dtype=np.float32)
+        top_positions = np.zeros((top_k, n_columns), dtype=np.int64)
+
+    for column_start in range(0, n_columns, tile_size):
+        columns = np.arange(column_start, min(column_start + tile_size, n_columns))
+        for row_start in range(0, n_rows, tile_size):
+            rows = np.arange(row_start, min(row_start + tile_size, n_rows))
+            tile = score_tile(rows, columns)
+            if matrix is not None:
+                matrix[row_start : rows[-1] + 1, columns[0] : columns[-1] + 1] = tile
+            if top_k is not None:
+                # merge the current best values with the tile, and keep the top_k of each column
+                values = np.vstack(
+                    [top_values[:, columns], np.nan_to_num(tile, nan=-np.inf)]
+                )
+                positions = np.vstack(
+                    [
+                        top_positions[:, columns],
+                        np.repeat(rows[:, None], len(columns), axis=1),
+                    ]
+                )
+                best = np.argpartition(-values, top_k - 1, axis=0)[:top_k]
+                top_values[:, columns] = np.take_along_axis(values, best, axis=0)
+                top_positions[:, columns] = np.take_along_axis(positions, best, axis=0)
+        if path is not None:
+            matrix.flush()
+
+    if top_k is None:
+        return matrix, None
+    order = np.argsort(-top_values, axis=0, kind="stable")
+    top_values = np.take_along_axis(top_values, order, axis=0)
+    top_positions = np.take_along_axis(top_positions, order, axis=0)
+    top_values[np.isneginf(top_values)] = np.nan
+    return matrix, (top_values, top_positions)
+
+
+def correlation_tile_size(memory_budget, n_records):
+    """
+    Pass in a memory budget (in bytes) and the number of records, returns the number of features b such that a (b, b) tile of `nan_correlation` fits in the budget
+    (the two (n_records, b) inputs are copied about 4 times each, and about 6 (b, b) intermediate matrices are created, in float64)
+    """
+    # 8 * (8 * n_records * b + 6 * b²) <= memory_budget
+    a, b, c = 48, 64 * n_records, -memory_budget
+    return max(1, int((-b + np.sqrt(b**2 - 4 * a * c)) / (2 * a)))